@@ -1,8 +1,194 @@
-from django.contrib import admin
+import logging
+import time
+from datetime import timedelta
 
-# Register your models here.
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.db import connections
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from .models import Item
+from . import bulk
+from .models import Bid, Item
+from .pagination import ApproximateCountPaginator
+from .search import FTS_TABLE, match_expression
 
-admin.site.register(Item)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+CURSOR_VAR = 'cursor'
+
+
+class KeysetChangeList(ChangeList):
+    """Pages by ``pk < cursor`` instead of OFFSET when the list isn't re-sorted.
+
+    Page N then costs one index seek like page 1.  Sorting by a column
+    header falls back to Django's numbered pages.
+    """
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Changing a filter or the sort order starts again from the top.
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [*(remove or ()), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        self.keyset = ORDER_VAR not in self.params and not self.show_all
+        if not self.keyset:
+            return super().get_results(request)
+        try:
+            self.cursor = int(self.params.get(CURSOR_VAR) or 0)
+        except ValueError:
+            raise IncorrectLookupParameters
+        queryset = self.queryset.order_by('-pk')
+        if self.cursor:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        rows = list(queryset[:self.list_per_page + 1])
+        self.result_list = rows[:self.list_per_page]
+        self.next_cursor = self.result_list[-1].pk if len(rows) > self.list_per_page else None
+        self.next_url = self.get_query_string({CURSOR_VAR: self.next_cursor}) if self.next_cursor else None
+        self.first_url = self.get_query_string() if self.cursor else None
+
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+
+
+class LotStatusFilter(admin.SimpleListFilter):
+    title = 'status'
+    parameter_name = 'status'
+    field = 'auction_end_time'
+
+    def lookups(self, request, model_admin):
+        return (('open', 'Open'), ('closed', 'Closed'))
+
+    def queryset(self, request, queryset):
+        now = timezone.now()
+        if self.value() == 'open':
+            return queryset.filter(**{'%s__gt' % self.field: now})
+        if self.value() == 'closed':
+            return queryset.filter(**{'%s__lte' % self.field: now})
+        return queryset
+
+
+class BidLotStatusFilter(LotStatusFilter):
+    title = 'lot status'
+    field = 'item__auction_end_time'
+
+
+class HighVolumeAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/anammco/keyset_change_list.html'
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    list_per_page = 50
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+@admin.register(Item)
+class ItemAdmin(HighVolumeAdmin):
+    list_display = ('id', 'name', 'auction_end_time', 'current_bid', 'bid_count', 'top_bid', 'is_open')
+    list_display_links = ('id', 'name')
+    list_filter = (LotStatusFilter, ('auction_end_time', admin.DateFieldListFilter))
+    search_fields = ('name',)
+    actions = ('close_now', 'extend_hour', 'extend_day', 'relist')
+
+    def get_queryset(self, request):
+        # Correlated subqueries run for the rows on the page only, each an
+        # index range scan on (item_id, bid_amount), rather than joining
+        # and grouping every bid before the LIMIT applies.
+        bids = Bid.objects.filter(item=OuterRef('pk')).order_by().values('item')
+        return super().get_queryset(request).annotate(
+            bid_count=Coalesce(
+                Subquery(bids.annotate(count=Count('pk')).values('count'), output_field=IntegerField()),
+                Value(0),
+            ),
+            top_bid=Subquery(bids.annotate(top=Max('bid_amount')).values('top')),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        # A lot id seeks the primary key; words go through the FTS index on
+        # SQLite instead of a LIKE over every name.
+        term = search_term.strip()
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        if term and connections[queryset.db].vendor == 'sqlite':
+            expression = match_expression(term)
+            if expression is None:
+                return queryset.none(), False
+            matches = RawSQL('SELECT rowid FROM %s WHERE %s MATCH %%s' % (FTS_TABLE, FTS_TABLE), [expression])
+            return queryset.filter(pk__in=matches), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def _bulk(self, request, verb, apply, queryset, *args):
+        started = time.perf_counter()
+
+        def progress(done, seconds):
+            # Big selections take a while; the log shows how far along they are.
+            logger.info('%s: %d lots in %.1fs', verb, done, seconds)
+
+        count = apply(queryset, *args, progress=progress)
+        self.message_user(
+            request, '%s %d lots in %.1fs.' % (verb, count, time.perf_counter() - started),
+            messages.SUCCESS if count else messages.WARNING,
+        )
+
+    @admin.action(description='Close selected open lots now', permissions=['change'])
+    def close_now(self, request, queryset):
+        self._bulk(request, 'Closed', bulk.close, queryset)
+
+    @admin.action(description='Extend selected open lots by an hour', permissions=['change'])
+    def extend_hour(self, request, queryset):
+        self._bulk(request, 'Extended', bulk.extend, queryset, timedelta(hours=1))
+
+    @admin.action(description='Extend selected open lots by a day', permissions=['change'])
+    def extend_day(self, request, queryset):
+        self._bulk(request, 'Extended', bulk.extend, queryset, timedelta(days=1))
+
+    @admin.action(description='Relist selected unsold lots', permissions=['add'])
+    def relist(self, request, queryset):
+        end_time = timezone.now() + timedelta(hours=settings.ANAMMCO_RELIST_HOURS)
+        self._bulk(request, 'Relisted', bulk.relist, queryset, end_time)
+
+    @admin.display(description='bids')
+    def bid_count(self, item):
+        return item.bid_count
+
+    @admin.display(description='top bid')
+    def top_bid(self, item):
+        return item.top_bid
+
+    @admin.display(description='open', boolean=True)
+    def is_open(self, item):
+        return item.auction_end_time > timezone.now()
+
+
+@admin.register(Bid)
+class BidAdmin(HighVolumeAdmin):
+    list_display = ('id', 'item', 'bidder', 'bid_amount')
+    list_select_related = ('item', 'bidder')
+    list_filter = (BidLotStatusFilter, ('item__auction_end_time', admin.DateFieldListFilter))
+    raw_id_fields = ('item', 'bidder')
+    search_help_text = 'Bid, lot or bidder id.'
+    search_fields = ('=id',)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term.isdigit():
+            return queryset.none() if term else queryset, False
+        value = int(term)
+        return queryset.filter(Q(pk=value) | Q(item_id=value) | Q(bidder_id=value)), False
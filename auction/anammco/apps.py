@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+class AnammcoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'anammco'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .perf import install_sql_timer
+        from .querybudget import install_budget_wrapper
+        from .schema import ensure_schema
+
+        post_migrate.connect(ensure_schema, sender=self)
+        connection_created.connect(install_sql_timer)
+        connection_created.connect(install_budget_wrapper)
@@ -0,0 +1,180 @@
+"""
+Async versions of the bidding hot path, for running under ASGI.
+
+Django 4.2's async ORM still funnels every query through one shared
+thread, so blocking database work here goes to ``db_executor``: a bounded
+pool whose threads each keep their own persistent connection, recycled
+per ``CONN_MAX_AGE`` and ``CONN_HEALTH_CHECKS`` as request threads' are.
+The event loop itself only parses requests, renders and waits, which lets
+one process hold thousands of idle or long-polling clients.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections, connections
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response, quote_etag
+
+from .bid_cache import bid_cache
+from .bidding import parse_amount, place
+from .images import images_for
+from .ingest import BidQueueFull
+from .querybudget import query_budget
+from .ratelimit import rate_limit_bids
+from .realtime import broker
+from .views import BID_QUERY_BUDGET, LIST_QUERY_BUDGET, LIST_TEMPLATE, _list_page, auction_list_etag
+
+db_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ANAMMCO_DB_THREADS', 8), thread_name_prefix='anammco-db',
+)
+
+
+def in_db_pool(func):
+    return sync_to_async(_fresh_connections(func), thread_sensitive=False, executor=db_executor)
+
+
+def _fresh_connections(func):
+    # Pool threads never see request_started/request_finished, so they
+    # drop stale or broken connections around each call themselves.
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapped
+
+
+def pooled(view):
+    """Serve the sync ``view`` from ``db_executor``.
+
+    Under ASGI Django runs sync views one at a time on a single shared
+    thread; wrapped, they run side by side on the pool instead.  A
+    streaming response is handed to the server through ``aiterate``,
+    rather than buffered whole as Django does with sync iterators.
+    """
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        response = await in_db_pool(view)(request, *args, **kwargs)
+        if getattr(response, 'streaming', False) and not response.is_async:
+            response.streaming_content = aiterate(response.streaming_content)
+        return response
+    return wrapped
+
+
+async def aiterate(iterable):
+    """Yield the pieces of the sync ``iterable`` without blocking the loop.
+
+    Every piece is pulled on one thread of its own: a database cursor
+    behind the iterator has to stay with the connection that opened it,
+    which a ``db_executor`` thread would lend to other requests between
+    pieces.  That connection is closed when the iterator is done.
+    """
+    iterator = iter(iterable)
+    thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='anammco-stream')
+    pull = sync_to_async(next, thread_sensitive=False, executor=thread)
+    try:
+        while True:
+            piece = await pull(iterator, _DONE)
+            if piece is _DONE:
+                break
+            yield piece
+    finally:
+        await sync_to_async(_finish, thread_sensitive=False, executor=thread)(iterator)
+        thread.shutdown(wait=False)
+
+
+_DONE = object()
+
+
+def _finish(iterator):
+    try:
+        if hasattr(iterator, 'close'):
+            iterator.close()
+    finally:
+        connections.close_all()
+
+
+def _authenticated(request):
+    # Loads the session and user in the pool; later request.user access is cached.
+    return request.user.is_authenticated
+
+
+def alogin_required(view):
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if not await in_db_pool(_authenticated)(request):
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapped
+
+
+async def index(request):
+    return render(request, 'anammco/index.html')
+
+
+@query_budget(LIST_QUERY_BUDGET)
+@alogin_required
+async def auction_list(request):
+    etag = quote_etag(await in_db_pool(auction_list_etag)(request))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        page = _list_page(request)
+        ids = [item.pk for item in page]
+        prices = await in_db_pool(bid_cache.prices_for)(ids)
+        images = await in_db_pool(images_for)(ids)
+        for item in page:
+            item.current_bid = prices.get(item.pk)
+            item.image = images.get(item.pk)
+        response = render(request, LIST_TEMPLATE, {
+            'items': page.items,
+            'page': page,
+            'lot_cache_ttl': settings.ANAMMCO_LOT_FRAGMENT_TTL,
+        })
+    response.headers.setdefault('ETag', etag)
+    return response
+
+
+@query_budget(BID_QUERY_BUDGET)
+@alogin_required
+@rate_limit_bids
+async def place_bid(request, item_id):
+    accepted = False
+    if request.method == 'POST':
+        bid_amount = parse_amount(request.POST.get('bid_amount'))
+        if bid_amount is not None:
+            try:
+                accepted = await in_db_pool(place)(request.user, item_id, bid_amount)
+            except BidQueueFull:
+                return HttpResponse('Too many bids in flight, try again.', status=503)
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'item': item_id, 'accepted': accepted})
+    return redirect('auction_list')
+
+
+@alogin_required
+async def wait_for_bid(request, item_id):
+    """Long-poll: answer as soon as the price moves away from ``?price=``.
+
+    Responds 204 after ``ANAMMCO_LONG_POLL_SECONDS`` without a change.
+    """
+    subscription = broker.subscribe([item_id])
+    try:
+        current = (await in_db_pool(bid_cache.prices_for)([item_id])).get(item_id)
+        if current is None:
+            return HttpResponse(status=404)
+        if str(current) != request.GET.get('price'):
+            return JsonResponse({'item': item_id, 'current_bid': current})
+        try:
+            payloads = await asyncio.wait_for(subscription.next(), settings.ANAMMCO_LONG_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            return HttpResponse(status=204)
+        return HttpResponse(payloads[-1], content_type='application/json')
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,96 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+class UserCache:
+    """Users by id, in a bounded per-process LRU with a short TTL.
+
+    Each user has a version in a cache every worker shares, bumped when the
+    user is saved (password change, deactivation) or logs out.  An entry is
+    only served while its version is current, so an eviction in one worker
+    reaches all of them on their next request; checking costs one shared
+    cache read, no query.  Callers get a deep copy, so nothing a request
+    sets on its user or caches on related objects leaks into the next one.
+    """
+
+    version_key = 'anammco:userver:%s'
+
+    def __init__(self, max_entries=10000, ttl=30, versions=None, version_ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions = caches[versions] if versions else None
+        # Must outlive ``ttl``: once a version expires, entries cached
+        # before it was bumped would look current again.
+        self.version_ttl = max(version_ttl, 2 * ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, user_id):
+        """The user's current version; read it before loading the user."""
+        if self.versions is None:
+            return None
+        return self.versions.get(self.version_key % user_id, 0)
+
+    def get(self, user_id, version=None):
+        key = str(user_id)  # Sessions hold the id as a string.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic() or entry[2] != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(entry[0])
+
+    def set(self, user_id, user, version=None):
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(user), time.monotonic() + self.ttl, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+        if self.versions is not None:
+            # A clock value, not incr(): two workers bumping at once still
+            # leave a number no cached entry carries.
+            self.versions.set(self.version_key % user_id, time.time_ns(), self.version_ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _from_settings():
+    options = getattr(settings, 'ANAMMCO_USER_CACHE', {})
+    return UserCache(
+        max_entries=options.get('MAX_ENTRIES', 10000),
+        ttl=options.get('TTL', 30),
+        versions=options.get('VERSIONS'),
+        version_ttl=options.get('VERSION_TTL', 3600),
+    )
+
+
+user_cache = _from_settings()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose per-request user lookup is served from ``user_cache``."""
+
+    def get_user(self, user_id):
+        version = user_cache.version(user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(user_id, user, version)
+        return user
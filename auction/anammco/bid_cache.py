@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+
+from .models import Item
+
+
+class BidCache:
+    """Highest accepted bid per item, kept in front of ``Item.current_bid``.
+
+    Prices live in a shared Django cache backend, so every worker sees the
+    same values, with a bounded in-process LRU in front of it.  The LRU only
+    holds a price for ``local_ttl`` seconds when a shared backend is set, so
+    a bid taken by another worker shows up here within that time.  The
+    cache is written through by the bid engine and only ever moves up, so a
+    cached price is never above the real one and can be used to turn
+    hopeless bids away without touching the database.
+    """
+
+    key_prefix = 'anammco:bid:'
+
+    def __init__(self, max_entries=10000, ttl=300, backend=None, local_ttl=1):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = caches[backend] if backend else None
+        self.local_ttl = min(ttl, local_ttl) if self.backend is not None else ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, item_id):
+        return '%s%s' % (self.key_prefix, item_id)
+
+    def _remember(self, item_id, price):
+        self._entries[item_id] = (price, time.monotonic() + self.local_ttl)
+        self._entries.move_to_end(item_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _local(self, item_id):
+        entry = self._entries.get(item_id)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._entries[item_id]
+            return None
+        self._entries.move_to_end(item_id)
+        return entry[0]
+
+    def get(self, item_id):
+        return self.get_many([item_id]).get(item_id)
+
+    def get_many(self, item_ids):
+        found = {}
+        with self._lock:
+            for item_id in item_ids:
+                price = self._local(item_id)
+                if price is not None:
+                    found[item_id] = price
+        missing = [item_id for item_id in item_ids if item_id not in found]
+        if missing and self.backend is not None:
+            shared = self.backend.get_many([self._key(item_id) for item_id in missing])
+            with self._lock:
+                for item_id in missing:
+                    price = shared.get(self._key(item_id))
+                    if price is not None:
+                        self._remember(item_id, price)
+                        found[item_id] = price
+        return found
+
+    def set(self, item_id, price):
+        with self._lock:
+            current = self._local(item_id)
+            if current is not None and current >= price:
+                return
+            self._remember(item_id, price)
+        if self.backend is not None:
+            # Not atomic, but it keeps a worker that lagged behind from
+            # writing an older price over a newer one in most cases.
+            shared = self.backend.get(self._key(item_id))
+            if shared is None or shared < price:
+                self.backend.set(self._key(item_id), price, self.ttl)
+
+    def set_many(self, prices):
+        with self._lock:
+            for item_id, price in prices.items():
+                self._remember(item_id, price)
+        if self.backend is not None:
+            self.backend.set_many(
+                {self._key(item_id): price for item_id, price in prices.items()}, self.ttl,
+            )
+
+    def invalidate(self, item_id):
+        with self._lock:
+            self._entries.pop(item_id, None)
+        if self.backend is not None:
+            self.backend.delete(self._key(item_id))
+
+    def invalidate_many(self, item_ids):
+        with self._lock:
+            for item_id in item_ids:
+                self._entries.pop(item_id, None)
+        if self.backend is not None:
+            self.backend.delete_many([self._key(item_id) for item_id in item_ids])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def prices_for(self, item_ids):
+        """Return ``{item_id: current_bid}``, loading misses in one query.
+
+        Misses are read from the primary: a lagging replica's price would
+        otherwise be cached, and shown, for the whole TTL.
+        """
+        prices = self.get_many(item_ids)
+        missing = [item_id for item_id in item_ids if item_id not in prices]
+        if missing:
+            loaded = dict(Item.objects.using(router.db_for_write(Item)).filter(
+                pk__in=missing,
+            ).values_list('pk', 'current_bid'))
+            self.set_many(loaded)
+            prices.update(loaded)
+        return prices
+
+
+def _from_settings():
+    options = getattr(settings, 'ANAMMCO_BID_CACHE', {})
+    return BidCache(
+        max_entries=options.get('MAX_ENTRIES', 10000),
+        ttl=options.get('TTL', 300),
+        backend=options.get('BACKEND'),
+        local_ttl=options.get('LOCAL_TTL', 1),
+    )
+
+
+bid_cache = _from_settings()
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .bid_cache import bid_cache
+from .closing import not_settled
+from .db import retry_on_busy
+from .fragments import bump_lot_version
+from .models import Item, Bid
+from .realtime import broker
+
+
+CENT = Decimal('0.01')
+
+
+def _largest_amount():
+    # The narrowest of the columns a bid amount is written to.
+    fields = (Item._meta.get_field('current_bid'), Bid._meta.get_field('bid_amount'))
+    return min(Decimal(10) ** (field.max_digits - field.decimal_places) - CENT for field in fields)
+
+
+MAX_AMOUNT = _largest_amount()
+
+
+def parse_amount(raw):
+    """Return ``raw`` as a positive Decimal in cents, or None if it isn't one.
+
+    Amounts that round to zero or don't fit the price columns are refused
+    here, before they can fail in the database.
+    """
+    try:
+        amount = Decimal(raw).quantize(CENT)
+        if not amount.is_finite() or not 0 < amount <= MAX_AMOUNT:
+            return None
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return amount
+
+
+class BidOutcome:
+    """Result of ``accept_bid``; true when the bid was accepted."""
+
+    __slots__ = ('accepted', 'extended_to')
+
+    def __init__(self, accepted, extended_to=None):
+        self.accepted = accepted
+        self.extended_to = extended_to
+
+    def __bool__(self):
+        return self.accepted
+
+
+def extend_if_closing(item_id, now):
+    """Soft close: push a lot's deadline out when it is bid on near the end.
+
+    A lot closing within ``WINDOW`` seconds moves to ``now + EXTEND_TO``.
+    With ``EXTEND_TO`` larger than ``WINDOW`` one extension covers a whole
+    burst of late bids, so a closing-second storm costs one extra UPDATE,
+    not one per bid.  Returns the new deadline, or None.
+    """
+    options = getattr(settings, 'ANAMMCO_SOFT_CLOSE', None)
+    if not options:
+        return None
+    new_end = now + timedelta(seconds=options['EXTEND_TO'])
+    threshold = min(new_end, now + timedelta(seconds=options['WINDOW']))
+    if Item.objects.filter(pk=item_id, auction_end_time__lt=threshold).update(auction_end_time=new_end):
+        return new_end
+    return None
+
+
+@retry_on_busy
+def accept_bid(user, item_id, amount):
+    """Record ``amount`` on ``item_id`` if it beats the current bid.
+
+    The compare-and-set is a single conditional UPDATE that only touches
+    ``current_bid``, so two bidders racing on the same item can never both
+    win and the row count tells us the outcome without reading it back.
+    Bids on lots past their ``auction_end_time``, or already settled, never
+    match; late bids extend the deadline in the same transaction.
+    """
+    extended_to = None
+    with transaction.atomic():
+        # The time a bid is judged by is read once the write lock is held,
+        # not when the bid started waiting for it behind the closer.
+        now = timezone.now()
+        accepted = Item.objects.filter(
+            not_settled(item_id), pk=item_id, current_bid__lt=amount, auction_end_time__gt=now,
+        ).update(current_bid=amount)
+        if accepted:
+            Bid.objects.create(bidder=user, item_id=item_id, bid_amount=amount)
+            extended_to = extend_if_closing(item_id, now)
+    return BidOutcome(bool(accepted), extended_to)
+
+
+def publish_price(item_id, amount, extended_to=None):
+    """Fan an accepted price out to the cache, the lot's list fragment and watchers."""
+    bid_cache.set(item_id, amount)
+    bump_lot_version(item_id)
+    if extended_to is not None:
+        broker.publish(item_id, current_bid=amount, auction_end_time=extended_to)
+    else:
+        broker.publish(item_id, current_bid=amount)
+
+
+def place(user, item_id, amount):
+    """Run a bid past the price cache, then the database.
+
+    Bids at or below the cached price cannot win and are rejected without
+    a query.  With ``ANAMMCO_GROUP_COMMIT`` set the bid is committed by the
+    group-commit writer and this waits for its batch.  An accepted bid gives
+    proxy bidders on the lot their chance to answer, then the final price is
+    published.
+    """
+    # Both build on accept_bid.
+    from .ingest import group_writer
+    from .proxy import resolve_proxies
+
+    cached = bid_cache.get(item_id)
+    if cached is not None and amount <= cached:
+        return False
+    writer = group_writer()
+    if writer is not None:
+        outcome = writer.submit(user, item_id, amount).result()
+    else:
+        outcome = accept_bid(user, item_id, amount)
+    if outcome:
+        price, extended_to = resolve_proxies(item_id)
+        publish_price(item_id, price or amount, extended_to or outcome.extended_to)
+    return bool(outcome)
@@ -0,0 +1,99 @@
+"""
+Set-based changes to many lots at once, behind the admin's bulk actions.
+
+Lots are walked by primary key ``batch_size`` at a time and each batch is
+changed with one UPDATE, all in a single transaction.  Each batch sends
+one ``lots_changed`` signal once the transaction commits, instead of a
+post_save per lot.  Everything runs on the write database, whichever
+database the admin's queryset would read from.
+"""
+import time
+from functools import partial
+
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .closing import SETTLEMENT_TABLE, AuctionCloser
+from .models import Bid, Item
+from .signals import lots_changed
+
+BATCH_SIZE = 1000
+
+
+def apply_in_batches(queryset, change, batch_size=BATCH_SIZE, progress=None):
+    """Call ``change(ids)`` for every lot in ``queryset``, ``batch_size`` at a time.
+
+    ``change`` returns the ids whose cached state it made stale.
+    ``progress(done, seconds)`` is called after each batch.  Returns the
+    number of lots changed.
+    """
+    using = router.db_for_write(Item)
+    ids = queryset.using(using).order_by('pk').values_list('pk', flat=True)
+    started = time.perf_counter()
+    done = last = 0
+    with transaction.atomic(using=using):
+        while True:
+            batch = list(ids.filter(pk__gt=last)[:batch_size])
+            if not batch:
+                break
+            last = batch[-1]
+            stale = change(batch)
+            transaction.on_commit(partial(lots_changed.send, sender=Item, item_ids=stale), using=using)
+            done += len(batch)
+            if progress:
+                progress(done, time.perf_counter() - started)
+    return done
+
+
+def close(queryset, now=None, **kwargs):
+    """End open lots now and settle them without waiting for the closer."""
+    now = now or timezone.now()
+    closer = AuctionCloser()
+
+    def change(ids):
+        Item.objects.using(router.db_for_write(Item)).filter(pk__in=ids).update(auction_end_time=now)
+        closer.settle(ids)
+        return ids
+
+    return apply_in_batches(queryset.filter(auction_end_time__gt=now), change, **kwargs)
+
+
+def extend(queryset, delta, **kwargs):
+    """Push back the end of open lots by ``delta``.
+
+    The closer re-reads a lot's end time when its old deadline comes up, so
+    it simply reschedules it.
+    """
+    def change(ids):
+        Item.objects.using(router.db_for_write(Item)).filter(pk__in=ids).update(
+            auction_end_time=F('auction_end_time') + delta,
+        )
+        return ids
+
+    return apply_in_batches(queryset.filter(auction_end_time__gt=timezone.now()), change, **kwargs)
+
+
+def relist(queryset, end_time, **kwargs):
+    """Reopen closed lots that drew no bids, until ``end_time``.
+
+    Their settlement rows go, so the closer settles them again once the new
+    deadline passes.
+    """
+    using = router.db_for_write(Item)
+    connection = connections[using]
+    unsold = queryset.filter(auction_end_time__lte=timezone.now()).exclude(
+        Exists(Bid.objects.filter(item=OuterRef('pk'))),
+    )
+
+    def change(ids):
+        Item.objects.using(using).filter(pk__in=ids).update(auction_end_time=end_time)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM %s WHERE item_id IN (%s)'
+                % (connection.ops.quote_name(SETTLEMENT_TABLE), ', '.join(['%s'] * len(ids))),
+                ids,
+            )
+        return ids
+
+    return apply_in_batches(unsold, change, **kwargs)
@@ -0,0 +1,167 @@
+import heapq
+import time
+
+from django.db import connections, router, transaction
+from django.db.models import BooleanField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .db import retry_on_busy
+from .models import Item, Bid
+
+SETTLEMENT_TABLE = 'anammco_settlement'
+
+
+def settlement_ddl(connection):
+    return (
+        'CREATE TABLE IF NOT EXISTS %s ('
+        'item_id bigint NOT NULL PRIMARY KEY, '
+        'bid_id bigint NULL, '
+        'closed_at %s NOT NULL)'
+    ) % (connection.ops.quote_name(SETTLEMENT_TABLE), connection.data_types['DateTimeField'])
+
+
+def unsettled():
+    return Item.objects.exclude(pk__in=RawSQL('SELECT item_id FROM %s' % SETTLEMENT_TABLE, []))
+
+
+def not_settled(item_id):
+    """Condition for a lot's UPDATEs: true until the closer has settled it."""
+    return RawSQL(
+        'NOT EXISTS (SELECT 1 FROM %s WHERE item_id = %%s)' % SETTLEMENT_TABLE, [item_id],
+        output_field=BooleanField(),
+    )
+
+
+class AuctionCloser:
+    """Settles auctions at their ``auction_end_time``.
+
+    Upcoming deadlines are kept in a min-heap, so the worker sleeps until
+    the next lot expires instead of polling the database.  A deadline that
+    moves is pushed again and the stale entry is skipped when it surfaces;
+    lots are re-checked against the database when they come due, so a lot
+    extended elsewhere is simply rescheduled.  Lots reopened after they were
+    settled are caught by ``load`` once their new deadline passes.
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.last_pk = 0
+        self.swept = None
+        self._heap = []
+        self._deadlines = {}
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def load(self):
+        """Schedule every unsettled lot created since the last load.
+
+        Older unsettled lots whose deadline passed since the last load, yet
+        aren't scheduled, were reopened (relisted) and are scheduled too.
+        """
+        now = timezone.now()
+        pending = unsettled().using(router.db_for_write(Item))
+        count = 0
+        if self.swept is not None:
+            reopened = pending.filter(
+                pk__lte=self.last_pk, auction_end_time__gt=self.swept, auction_end_time__lte=now,
+            ).values_list('pk', 'auction_end_time')
+            for pk, end_time in reopened:
+                if pk not in self._deadlines:
+                    self.schedule(pk, end_time)
+                    count += 1
+        self.swept = now
+        rows = pending.filter(pk__gt=self.last_pk).order_by('pk').values_list('pk', 'auction_end_time')
+        for pk, end_time in rows.iterator(chunk_size=5000):
+            self.schedule(pk, end_time)
+            self.last_pk = pk
+            count += 1
+        return count
+
+    def schedule(self, item_id, end_time):
+        self._deadlines[item_id] = end_time
+        heapq.heappush(self._heap, (end_time, item_id))
+
+    def next_deadline(self):
+        while self._heap:
+            end_time, item_id = self._heap[0]
+            if self._deadlines.get(item_id) == end_time:
+                return end_time
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now):
+        """Return ``(item_ids, oldest_deadline)`` for lots due by ``now``."""
+        due, oldest = [], None
+        while self._heap and self._heap[0][0] <= now:
+            end_time, item_id = heapq.heappop(self._heap)
+            if self._deadlines.get(item_id) == end_time:
+                del self._deadlines[item_id]
+                due.append(item_id)
+                oldest = oldest or end_time
+        return due, oldest
+
+    @retry_on_busy
+    def settle(self, item_ids):
+        """Close ``item_ids`` that have really expired and record their winners.
+
+        "Expired" is judged against the time once the write lock is held, as
+        ``accept_bid`` does, so a bid and its settlement can't both pass.
+        Retried as a whole while the database is busy, like ``accept_bid``.
+        Returns the number of lots settled.
+        """
+        using = router.db_for_write(Item)
+        connection = connections[using]
+        winner = Bid.objects.filter(item=OuterRef('pk')).order_by('-bid_amount', 'pk').values('pk')[:1]
+        with transaction.atomic(using=using):
+            now = timezone.now()
+            rows = Item.objects.using(using).filter(pk__in=item_ids).annotate(
+                winner=Subquery(winner),
+            ).values_list('pk', 'auction_end_time', 'winner')
+            closed_at = connection.ops.adapt_datetimefield_value(now)
+            settled = []
+            for pk, end_time, bid_id in rows:
+                if end_time > now:
+                    self.schedule(pk, end_time)
+                else:
+                    settled.append((pk, bid_id, closed_at))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO %s (item_id, bid_id, closed_at) VALUES (%%s, %%s, %%s) '
+                    'ON CONFLICT (item_id) DO NOTHING' % connection.ops.quote_name(SETTLEMENT_TABLE),
+                    settled,
+                )
+        return len(settled)
+
+    def close_due(self, now=None):
+        """Settle everything due by ``now``.
+
+        Returns ``(settled, lag)`` where ``lag`` is how many seconds after
+        its deadline the oldest due lot was closed.
+        """
+        now = now or timezone.now()
+        due, oldest = self.pop_due(now)
+        settled = 0
+        for start in range(0, len(due), self.batch_size):
+            settled += self.settle(due[start:start + self.batch_size])
+        lag = (timezone.now() - oldest).total_seconds() if oldest else 0.0
+        return settled, lag
+
+    def run(self, refresh=60, log=None):
+        """Close lots as they expire until interrupted."""
+        self.load()
+        next_refresh = time.monotonic() + refresh
+        while True:
+            settled, lag = self.close_due()
+            if settled and log:
+                log(settled, lag, len(self))
+            if time.monotonic() >= next_refresh:
+                self.load()
+                next_refresh = time.monotonic() + refresh
+            wait = next_refresh - time.monotonic()
+            deadline = self.next_deadline()
+            if deadline is not None:
+                wait = min(wait, (deadline - timezone.now()).total_seconds())
+            if wait > 0:
+                time.sleep(wait)
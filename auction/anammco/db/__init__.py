@@ -0,0 +1,31 @@
+import random
+import time
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+
+def is_busy(exc):
+    message = str(exc).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def retry_on_busy(func=None, attempts=5, delay=0.01, using=DEFAULT_DB_ALIAS):
+    """Retry ``func`` with jittered exponential backoff while SQLite is busy.
+
+    A transaction can only be retried as a whole, so inside an atomic block
+    the error is re-raised for the outermost caller to deal with.
+    """
+    if func is None:
+        return lambda func: retry_on_busy(func, attempts, delay, using)
+
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt == attempts - 1 or not is_busy(exc) or connections[using].in_atomic_block:
+                    raise
+            time.sleep(delay * 2 ** attempt * (0.5 + random.random()))
+    return wrapped
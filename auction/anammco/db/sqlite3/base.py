@@ -0,0 +1,43 @@
+"""
+SQLite backend tuned for a busy auction site.
+
+Every new connection gets the pragmas below (WAL so readers never block the
+bid writer), and transactions can be opened with ``BEGIN IMMEDIATE`` so a
+writer takes its lock up front instead of failing halfway through.  Both are
+configured through ``OPTIONS``::
+
+    'OPTIONS': {
+        'transaction_mode': 'IMMEDIATE',
+        'pragmas': {'cache_size': -64000},
+    }
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute('PRAGMA %s = %s' % (name, value))
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute('BEGIN %s' % self.transaction_mode)
+        else:
+            super()._start_transaction_under_autocommit()
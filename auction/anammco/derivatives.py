@@ -0,0 +1,55 @@
+"""
+Lot photo derivatives.  Runs in worker processes, so nothing here touches
+Django: it works on plain paths under MEDIA_ROOT.
+
+Every file is named after the SHA-256 of the original upload, so a
+derivative that exists on disk is already correct and is never rebuilt.
+"""
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Lot images need Pillow.
+    Image = ImageOps = None
+
+QUALITY = 80
+
+
+def original_name(digest, extension):
+    return 'lots/%s/%s%s' % (digest[:2], digest, extension)
+
+
+def derivative_name(digest, label):
+    return 'lots/%s/%s-%s.webp' % (digest[:2], digest, label)
+
+
+def build(root, original, digest, widths, thumbnail):
+    """Write the missing WebP derivatives of ``original``.
+
+    Makes one copy per width narrower than the photo and a square
+    ``thumbnail``.  Returns the widths made, narrowest first.
+    """
+    with Image.open(os.path.join(root, original)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        made = [width for width in sorted(widths) if width < image.width]
+        for width in made:
+            _write(root, derivative_name(digest, width), lambda: _scaled(image, width))
+        _write(root, derivative_name(digest, 'thumb'),
+               lambda: ImageOps.fit(image, (thumbnail, thumbnail), Image.LANCZOS))
+    return made
+
+
+def _scaled(image, width):
+    return image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+
+def _write(root, name, render):
+    path = os.path.join(root, name)
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+    render().save(partial, 'WEBP', quality=QUALITY, method=6)
+    os.replace(partial, path)
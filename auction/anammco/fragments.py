@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'anammco:lotver:%s'
+
+
+def _versions():
+    return caches[getattr(settings, 'ANAMMCO_LOT_VERSION_CACHE', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'ANAMMCO_LOT_VERSION_TTL', 3600)
+
+
+def _seed():
+    # Versions come from the clock, so a version that expired or was evicted
+    # never comes back with a number an older cached fragment was stored under.
+    return time.time_ns()
+
+
+def lot_versions(item_ids):
+    """Return ``{item_id: version}`` for the lot fragments in ``item_ids``."""
+    cache = _versions()
+    keys = {VERSION_KEY % item_id: item_id for item_id in item_ids}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _seed(), _ttl())
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_lot_version(item_id):
+    """Make the next list render re-render ``item_id``'s fragment.
+
+    A fresh clock seed is above any version set earlier, so it stands in
+    for an increment; unlike ``incr`` on most shared backends, two workers
+    bumping at once can't both write the same number.
+    """
+    _versions().set(VERSION_KEY % item_id, _seed(), _ttl())
+
+
+def bump_lot_versions(item_ids):
+    """``bump_lot_version`` for many lots in one cache round trip."""
+    _versions().set_many({VERSION_KEY % item_id: _seed() for item_id in item_ids}, _ttl())
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db import connections, router
+
+from . import derivatives
+from .fragments import bump_lot_version
+from .models import Item
+
+logger = logging.getLogger(__name__)
+
+LOTIMAGE_TABLE = 'anammco_lotimage'
+
+_pool = None
+
+
+def lotimage_ddl(connection):
+    quote = connection.ops.quote_name
+    table = quote(LOTIMAGE_TABLE)
+    return [
+        'CREATE TABLE IF NOT EXISTS %s ('
+        'id %s NOT NULL PRIMARY KEY %s, '
+        'item_id bigint NOT NULL, '
+        'name varchar(255) NOT NULL, '
+        'digest varchar(64) NOT NULL, '
+        'width integer NOT NULL, '
+        'height integer NOT NULL, '
+        # Comma-separated derivative widths; NULL until they are built.
+        'widths varchar(100) NULL)' % (
+            table,
+            connection.data_types['BigAutoField'],
+            connection.data_types_suffix.get('BigAutoField', ''),
+        ),
+        'CREATE INDEX IF NOT EXISTS %s ON %s (item_id, id)' % (quote('anammco_lotimage_item'), table),
+    ]
+
+
+class LotImage:
+    """A lot's photo, with the URLs templates need."""
+
+    __slots__ = ('name', 'digest', 'width', 'height', 'widths')
+
+    def __init__(self, name, digest, width, height, widths):
+        self.name = name
+        self.digest = digest
+        self.width = width
+        self.height = height
+        self.widths = [int(width) for width in widths.split(',') if width] if widths is not None else None
+
+    @property
+    def ready(self):
+        return self.widths is not None
+
+    @property
+    def url(self):
+        return default_storage.url(self.name)
+
+    @property
+    def thumbnail_url(self):
+        if not self.ready:
+            return self.url
+        return default_storage.url(derivatives.derivative_name(self.digest, 'thumb'))
+
+    def src(self, target=640):
+        """The smallest copy at least ``target`` pixels wide."""
+        for width in self.widths or ():
+            if width >= target:
+                return default_storage.url(derivatives.derivative_name(self.digest, width))
+        return self.url
+
+    @property
+    def srcset(self):
+        candidates = ['%s %dw' % (default_storage.url(derivatives.derivative_name(self.digest, width)), width)
+                      for width in self.widths or ()]
+        candidates.append('%s %dw' % (self.url, self.width))
+        return ', '.join(candidates)
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=getattr(settings, 'ANAMMCO_IMAGE_WORKERS', 2))
+    return _pool
+
+
+def _connection():
+    return connections[router.db_for_write(Item)]
+
+
+def store_upload(item_id, upload):
+    """Save ``upload`` as ``item_id``'s photo and start building its derivatives.
+
+    The original is stored under its SHA-256, so the same photo uploaded
+    twice is kept (and processed) once.  Raises ValueError for files that
+    aren't images.
+    """
+    if derivatives.Image is None:
+        raise ImproperlyConfigured('Lot images need Pillow installed.')
+    try:
+        with derivatives.Image.open(upload) as image:
+            image.verify()
+    except Exception as exc:
+        raise ValueError('Not an image: %s' % exc)
+    upload.seek(0)
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    digest = digest.hexdigest()
+    extension = os.path.splitext(upload.name)[1].lower()[:10] or '.img'
+    name = derivatives.original_name(digest, extension)
+    if not default_storage.exists(name):
+        upload.seek(0)
+        name = default_storage.save(name, upload)
+    with derivatives.Image.open(default_storage.path(name)) as image:
+        width, height = derivatives.ImageOps.exif_transpose(image).size
+
+    connection = _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO %s (item_id, name, digest, width, height) VALUES (%%s, %%s, %%s, %%s, %%s)'
+            % connection.ops.quote_name(LOTIMAGE_TABLE),
+            [item_id, name, digest, width, height],
+        )
+        row_id = connection.ops.last_insert_id(cursor, LOTIMAGE_TABLE, 'id')
+    future = _executor().submit(
+        derivatives.build, str(settings.MEDIA_ROOT), name, digest,
+        settings.ANAMMCO_IMAGE_WIDTHS, settings.ANAMMCO_IMAGE_THUMBNAIL,
+    )
+    future.add_done_callback(partial(_built, row_id, item_id))
+    return digest
+
+
+def _built(row_id, item_id, future):
+    # Runs on the pool's management thread once a worker has finished.
+    try:
+        widths = future.result()
+    except Exception:
+        logger.exception('Building derivatives for lot image %s failed', row_id)
+        return
+    connection = _connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE %s SET widths = %%s WHERE id = %%s' % connection.ops.quote_name(LOTIMAGE_TABLE),
+                [','.join(map(str, widths)), row_id],
+            )
+    finally:
+        connection.close()
+    bump_lot_version(item_id)
+
+
+def images_for(item_ids):
+    """Return ``{item_id: LotImage}`` with each lot's latest photo, in one query."""
+    if not item_ids:
+        return {}
+    connection = connections[router.db_for_read(Item)]
+    table = connection.ops.quote_name(LOTIMAGE_TABLE)
+    placeholders = ', '.join(['%s'] * len(item_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT item_id, name, digest, width, height, widths FROM %s WHERE id IN '
+            '(SELECT MAX(id) FROM %s WHERE item_id IN (%s) GROUP BY item_id)' % (table, table, placeholders),
+            list(item_ids),
+        )
+        return {row[0]: LotImage(*row[1:]) for row in cursor.fetchall()}
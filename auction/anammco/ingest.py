@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+from .bidding import accept_bid
+from .db import is_busy, retry_on_busy
+
+
+class BidQueueFull(Exception):
+    pass
+
+
+class GroupCommitWriter:
+    """Commit bids in batches from a single writer thread.
+
+    Callers get a Future for their bid.  The writer takes up to
+    ``batch_size`` queued bids, or whatever arrived within ``max_delay``
+    seconds of the first one, and applies them in one transaction, so many
+    bids share one fsync.  Each bid still runs the same conditional UPDATE
+    as ``accept_bid`` inside its own savepoint, so one failing bid doesn't
+    take the batch down with it -- unless the database is busy, in which
+    case the whole batch is rolled back and retried.
+    """
+
+    _stop = object()
+
+    def __init__(self, batch_size=64, max_delay=0.005, queue_size=10000):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, user, item_id, amount):
+        self._start()
+        future = Future()
+        try:
+            self._queue.put_nowait((user, item_id, amount, future))
+        except queue.Full:
+            raise BidQueueFull('bid queue is full')
+        return future
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='bid-writer', daemon=True)
+                    self._thread.start()
+
+    def stop(self):
+        """Commit what is queued, then end the writer thread and close its connection."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(self._stop)
+            thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                first = self._queue.get()
+                if first is self._stop:
+                    return
+                batch = [first]
+                deadline = time.monotonic() + self.max_delay
+                stopping = False
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        bid = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if bid is self._stop:
+                        stopping = True
+                        break
+                    batch.append(bid)
+                self._commit(batch)
+                if stopping:
+                    return
+        finally:
+            connections.close_all()
+
+    @retry_on_busy
+    def _apply(self, batch):
+        outcomes = []
+        with transaction.atomic():
+            for user, item_id, amount, future in batch:
+                try:
+                    outcomes.append((future, accept_bid(user, item_id, amount), None))
+                except OperationalError as exc:
+                    if is_busy(exc):
+                        raise  # Roll the batch back; retry_on_busy runs it again.
+                    outcomes.append((future, None, exc))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+        return outcomes
+
+    def _commit(self, batch):
+        try:
+            outcomes = self._apply(batch)
+        except Exception as exc:
+            for *_, future in batch:
+                future.set_exception(exc)
+            return
+        for future, accepted, exc in outcomes:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(accepted)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def group_writer():
+    """Return the process-wide writer, or None when group commit is off."""
+    global _writer
+    options = getattr(settings, 'ANAMMCO_GROUP_COMMIT', None)
+    if not options:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter(
+                    batch_size=options.get('BATCH_SIZE', 64),
+                    max_delay=options.get('MAX_DELAY_MS', 5) / 1000,
+                    queue_size=options.get('QUEUE_SIZE', 10000),
+                )
+    return _writer
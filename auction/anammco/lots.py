@@ -0,0 +1,226 @@
+"""
+Bulk lot import: rows keyed by an external lot number, upserted in chunks.
+
+Readers are generators over an open file yielding ``(position, row)``,
+where position is the row's line in the file (its index for JSON arrays),
+and a ValidationError in place of a row they cannot parse.  Each chunk
+is validated and written in its own transaction, so memory stays flat
+however large the input is.
+"""
+import csv
+import json
+import time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Item
+from .signals import lots_changed
+
+LOT_TABLE = 'anammco_lot'
+FIELDS = ('name', 'description', 'current_bid', 'auction_end_time')
+# current_bid is the opening price of a new lot; re-importing never
+# overwrites bids already placed.
+UPDATE_FIELDS = ('name', 'description', 'auction_end_time')
+# Invalid rows whose messages are kept when there is no error limit.
+ERRORS_KEPT = 1000
+
+
+class TooManyErrors(ValueError):
+    pass
+
+
+def lot_ddl(connection):
+    return (
+        'CREATE TABLE IF NOT EXISTS %s ('
+        'lot_number varchar(64) NOT NULL PRIMARY KEY, '
+        'item_id bigint NOT NULL)'
+    ) % connection.ops.quote_name(LOT_TABLE)
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield number, ValidationError('Invalid JSON: %s (column %d).' % (exc.msg, exc.colno))
+
+
+def read_json_array(stream, block_size=1 << 16):
+    """Yield the objects of a top-level JSON array without loading all of it."""
+    decoder = json.JSONDecoder()
+    buffer, position, opened = '', 0, False
+    count = 0
+    while True:
+        block = stream.read(block_size)
+        buffer = buffer[position:] + block
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not opened:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array.')
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not block:
+                    raise
+                break  # The object continues in the next block.
+            count += 1
+            yield count, row
+        if not block:
+            raise ValueError('The JSON array is not closed.')
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson, 'json': read_json_array}
+
+
+class LotImporter:
+    """Validate rows and upsert them as Items, ``chunk_size`` per transaction.
+
+    ``errors`` holds ``(position, message)`` for invalid rows.  Past
+    ``max_errors`` of them the import stops at once with TooManyErrors;
+    chunks written before then stay written.
+    """
+
+    def __init__(self, chunk_size=2000, using=None, max_errors=None):
+        self.chunk_size = chunk_size
+        self.using = using or router.db_for_write(Item)
+        self.max_errors = max_errors
+        self.fields = {name: Item._meta.get_field(name) for name in FIELDS}
+        self.created = self.updated = self.rejected = 0
+        self.errors = []
+
+    def clean(self, row):
+        """Return ``(lot_number, values)`` for a raw row; raise ValidationError."""
+        lot_number = str(row.get('lot_number') or '').strip()
+        if not lot_number or len(lot_number) > 64:
+            raise ValidationError('lot_number is required (at most 64 characters).')
+        values = {}
+        for name, field in self.fields.items():
+            raw = row.get(name)
+            if raw in (None, '') and name == 'current_bid':
+                raw = Decimal('0')
+            elif raw is None and name == 'description':
+                raw = ''
+            try:
+                value = field.clean(raw, None)
+            except ValidationError as exc:
+                raise ValidationError('%s: %s' % (name, '; '.join(exc.messages)))
+            if name == 'auction_end_time' and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            values[name] = value
+        return lot_number, values
+
+    def reject(self, position, exc):
+        self.rejected += 1
+        if len(self.errors) < (ERRORS_KEPT if self.max_errors is None else self.max_errors + 1):
+            self.errors.append((position, '; '.join(getattr(exc, 'messages', [str(exc)]))))
+        if self.max_errors is not None and self.rejected > self.max_errors:
+            raise TooManyErrors('More than %d invalid rows; stopping.' % self.max_errors)
+
+    def run(self, rows, progress=None):
+        """Import every ``(position, row)``; ``progress(rows_seen, seconds)`` is called per chunk."""
+        started = time.perf_counter()
+        chunk = {}
+        seen = 0
+        for seen, (position, row) in enumerate(rows, 1):
+            if isinstance(row, ValidationError):
+                self.reject(position, row)
+                continue
+            try:
+                lot_number, values = self.clean(row)
+            except (ValidationError, AttributeError) as exc:
+                self.reject(position, exc)
+                continue
+            chunk[lot_number] = values  # A lot listed twice keeps its last row.
+            if len(chunk) >= self.chunk_size:
+                self.write(chunk)
+                chunk = {}
+                if progress:
+                    progress(seen, time.perf_counter() - started)
+        if chunk:
+            self.write(chunk)
+        return seen, time.perf_counter() - started
+
+    def write(self, chunk):
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        table = quote(LOT_TABLE)
+        with transaction.atomic(using=self.using):
+            numbers = list(chunk)
+            existing = {}
+            # Stay under the backend's limit on query parameters.
+            step = connection.features.max_query_params or len(numbers)
+            with connection.cursor() as cursor:
+                for start in range(0, len(numbers), step):
+                    batch = numbers[start:start + step]
+                    # The item is NULL where the lot's Item has been deleted.
+                    cursor.execute(
+                        'SELECT l.lot_number, i.%s FROM %s l LEFT JOIN %s i ON i.%s = l.item_id '
+                        'WHERE l.lot_number IN (%s)' % (
+                            quote(Item._meta.pk.column), table, quote(Item._meta.db_table),
+                            quote(Item._meta.pk.column), ', '.join(['%s'] * len(batch)),
+                        ),
+                        batch,
+                    )
+                    existing.update(cursor.fetchall())
+            orphans = [number for number, item_id in existing.items() if item_id is None]
+            for number in orphans:
+                del existing[number]
+            with connection.cursor() as cursor:
+                # An orphaned lot number is imported as a new lot.
+                for start in range(0, len(orphans), step):
+                    batch = orphans[start:start + step]
+                    cursor.execute(
+                        'DELETE FROM %s WHERE lot_number IN (%s)' % (table, ', '.join(['%s'] * len(batch))),
+                        batch,
+                    )
+            new = [number for number in chunk if number not in existing]
+            items = Item.objects.using(self.using).bulk_create(
+                [Item(**chunk[number]) for number in new], batch_size=500,
+            )
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO %s (lot_number, item_id) VALUES (%%s, %%s)' % table,
+                    [(number, item.pk) for number, item in zip(new, items)],
+                )
+            if existing:
+                # One prepared UPDATE per row beats bulk_update's CASE WHEN
+                # chains, which grow with the batch.
+                fields = [self.fields[name] for name in UPDATE_FIELDS]
+                with connection.cursor() as cursor:
+                    cursor.executemany(
+                        'UPDATE %s SET %s WHERE %s = %%s' % (
+                            quote(Item._meta.db_table),
+                            ', '.join('%s = %%s' % quote(field.column) for field in fields),
+                            quote(Item._meta.pk.column),
+                        ),
+                        [
+                            [field.get_db_prep_save(chunk[number][field.name], connection) for field in fields]
+                            + [item_id]
+                            for number, item_id in existing.items()
+                        ],
+                    )
+        # No post_save for raw updates, so invalidate the chunk in one go.
+        if existing:
+            lots_changed.send(sender=Item, item_ids=list(existing.values()))
+        self.created += len(new)
+        self.updated += len(existing)
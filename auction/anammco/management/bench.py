@@ -0,0 +1,7 @@
+"""Helpers shared by the bench_* and loadtest commands."""
+
+
+def percentile(values, fraction):
+    """The value ``fraction`` of the way through ``values``; 0.0 when empty."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
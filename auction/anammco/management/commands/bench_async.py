@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+
+from anammco.bidding import place
+from anammco.bid_cache import bid_cache
+from anammco.management.bench import percentile
+from anammco.models import Item
+from anammco.realtime import broker
+
+
+class Command(BaseCommand):
+    help = 'Hold many long-poll clients on the async views and measure how fast a bid wakes them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[100, 1000])
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, clients, rounds, **options):
+        user, _ = get_user_model().objects.get_or_create(username='bench-async')
+        item = Item.objects.create(
+            name='Async bench lot', description='', current_bid=Decimal('1.00'),
+            auction_end_time=timezone.now() + timedelta(days=1),
+        )
+        client = Client()
+        client.force_login(user)
+        cookie = '%s=%s' % (settings.SESSION_COOKIE_NAME, client.cookies[settings.SESSION_COOKIE_NAME].value)
+        try:
+            for count in clients:
+                stats = asyncio.run(self.run(item.pk, user, cookie, count, rounds))
+                self.stdout.write(
+                    '%6d waiters on %d threads: held in %.0fms  wake p50 %.2fms  p99 %.2fms  max %.2fms'
+                    % (count, threading.active_count(), stats['held'], stats['p50'], stats['p99'], stats['max'])
+                )
+        finally:
+            item.delete()
+
+    async def run(self, item_id, user, cookie, count, rounds):
+        application = get_asgi_application()
+        latencies = []
+        bid = {}
+
+        async def wait(price):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': '/wait/%d/' % item_id, 'raw_path': b'',
+                'query_string': ('price=%s' % price).encode(), 'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            received = asyncio.Event()
+
+            async def receive():
+                if not received.is_set():
+                    received.set()
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and message['status'] == 200:
+                    latencies.append(time.perf_counter() - bid['at'])
+
+            await application(scope, receive, send)
+
+        price = (await sync_to_async(bid_cache.prices_for)([item_id]))[item_id]
+        started = time.perf_counter()
+        held = 0
+        for _ in range(rounds):
+            waiters = [asyncio.ensure_future(wait(price)) for _ in range(count)]
+            while broker.subscriber_count(item_id) < count:
+                if any(waiter.done() for waiter in waiters):
+                    raise CommandError('A long-poll request returned before the bid; check ALLOWED_HOSTS and the login.')
+                await asyncio.sleep(0.005)
+            held = held or (time.perf_counter() - started) * 1000
+            price += 1
+            bid['at'] = time.perf_counter()
+            await sync_to_async(place, thread_sensitive=False)(user, item_id, price)
+            await asyncio.gather(*waiters)
+        return {
+            'held': held,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': max(latencies) * 1000,
+        }
@@ -0,0 +1,65 @@
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from anammco.auth import user_cache
+from anammco.models import Item
+
+# What the project ran with before: a session row and a User row per request.
+BASELINE = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+}
+AUTH_TABLES = ('django_session', 'auth_user')
+
+
+class Command(BaseCommand):
+    help = 'Count the queries a logged-in request makes with DB sessions and with the cached session/auth setup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Page to request (default: the auction list).')
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, path, requests, **options):
+        path = path or reverse('auction_list')
+        user, _ = get_user_model().objects.get_or_create(username='bench-auth')
+        item = Item.objects.create(
+            name='Auth bench lot', description='', current_bid=Decimal('1.00'),
+            auction_end_time=timezone.now() + timedelta(days=1),
+        )
+        try:
+            with override_settings(**BASELINE):
+                before = self.run(user, path, requests)
+            after = self.run(user, path, requests)
+        finally:
+            item.delete()
+        for label, (total, auth, seconds) in (('db sessions, ModelBackend', before), ('cached', after)):
+            self.stdout.write('%-26s %5.2f queries/request (%.2f session+user)  %6.2fms/request' % (
+                label, total, auth, seconds * 1000,
+            ))
+        self.stdout.write('%.2f queries removed per request' % (before[0] - after[0]))
+
+    def run(self, user, path, requests):
+        user_cache.clear()
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        if client.get(path).status_code != 200:
+            raise CommandError('%s did not answer 200 for a logged-in user.' % path)
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            seconds = time.perf_counter() - started
+        queries = [query['sql'] for context in captured for query in context.captured_queries]
+        auth = [sql for sql in queries if any(table in sql for table in AUTH_TABLES)]
+        return len(queries) / requests, len(auth) / requests, seconds / requests
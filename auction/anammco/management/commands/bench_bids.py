@@ -0,0 +1,70 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone
+
+from anammco.bidding import accept_bid
+from anammco.models import Item, Bid
+
+
+class Command(BaseCommand):
+    help = 'Fire parallel bids at a single Item and report accepted bids/s and lost updates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bids', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=32)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark item and its bids.')
+
+    def handle(self, *args, bids, workers, keep, **options):
+        user, _ = get_user_model().objects.get_or_create(username='bench-bidder')
+        item = Item.objects.create(
+            name='Benchmark lot',
+            description='Concurrency benchmark',
+            current_bid=0,
+            auction_end_time=timezone.now() + timedelta(hours=1),
+        )
+        # A closing-minute surge: amounts climb, but racing bidders overlap.
+        amounts = [Decimal(n + random.randint(0, workers)) for n in range(1, bids + 1)]
+        accepted = []
+        errors = []
+        lock = threading.Lock()
+
+        def fire(amount):
+            try:
+                ok = accept_bid(user, item.pk, amount)
+            except OperationalError as exc:
+                with lock:
+                    errors.append(exc)
+                return
+            if ok:
+                with lock:
+                    accepted.append(amount)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(fire, amounts))
+        elapsed = time.perf_counter() - started
+
+        item.refresh_from_db()
+        rows = Bid.objects.filter(item=item).count()
+        best = max(accepted, default=Decimal(0))
+        # An accepted bid above the final price was silently overwritten.
+        lost = sum(1 for amount in accepted if amount > item.current_bid)
+
+        self.stdout.write('bids fired:        %d (%d workers)' % (bids, workers))
+        self.stdout.write('elapsed:           %.3fs (%.1f bids/s)' % (elapsed, bids / elapsed))
+        self.stdout.write('accepted:          %d (%.1f/s)' % (len(accepted), len(accepted) / elapsed))
+        self.stdout.write('db errors:         %d' % len(errors))
+        self.stdout.write('bid rows written:  %d' % rows)
+        self.stdout.write('final current_bid: %s (highest accepted %s)' % (item.current_bid, best))
+        self.stdout.write('lost updates:      %d' % lost)
+
+        if not keep:
+            item.delete()
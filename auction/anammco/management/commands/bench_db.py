@@ -0,0 +1,126 @@
+import itertools
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connections
+from django.utils import timezone
+
+from anammco.bidding import accept_bid
+from anammco.management.bench import percentile
+from anammco.models import Item
+from anammco.pagination import keyset_page
+
+PREFIX = 'bench-db '
+
+# What DATABASES['default'] looked like before the tuned backend: the stock
+# SQLite engine, a connection per request and deferred transactions.  WAL
+# mode is stored in the database file, so once the tuned backend has opened
+# it the baseline runs with WAL too.
+BASELINE = {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure mixed list reads and accept_bid writes through the configured default database, '
+        'then through the stock SQLite backend for comparison.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=20000)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--write-ratio', type=float, default=0.1)
+        parser.add_argument('--no-baseline', action='store_true', help='Only measure the configured backend.')
+
+    def handle(self, *args, ops, threads, items, write_ratio, no_baseline, **options):
+        user, _ = get_user_model().objects.get_or_create(username=PREFIX.strip())
+        end = timezone.now() + timedelta(days=1)
+        Item.objects.bulk_create([
+            Item(name='%s%d' % (PREFIX, n), description='', current_bid=0,
+                 auction_end_time=end + timedelta(seconds=n))
+            for n in range(items)
+        ], batch_size=1000)
+        lot_ids = list(Item.objects.filter(name__startswith=PREFIX).values_list('pk', flat=True))
+        configured = connections.settings[DEFAULT_DB_ALIAS]
+        runs = [('configured', configured)]
+        if not no_baseline and configured['ENGINE'] != BASELINE['ENGINE']:
+            runs.append(('stock sqlite3', {
+                **configured, **BASELINE,
+                'OPTIONS': {'timeout': configured['OPTIONS'].get('timeout', 5)},
+            }))
+        try:
+            for label, database in runs:
+                self.use(database)
+                self.stdout.write('%-14s %s' % (label, self.describe(database)))
+                self.report(self.drive(user, lot_ids, ops, threads, write_ratio))
+        finally:
+            self.use(configured)
+            Item.objects.filter(name__startswith=PREFIX).delete()
+            user.delete()
+
+    def use(self, database):
+        # Threads started after this open their connections from ``database``.
+        connections[DEFAULT_DB_ALIAS].close()
+        del connections[DEFAULT_DB_ALIAS]
+        connections.settings[DEFAULT_DB_ALIAS] = database
+
+    def describe(self, database):
+        options = database['OPTIONS']
+        return '%s, CONN_MAX_AGE=%s, transaction_mode=%s' % (
+            database['ENGINE'], database['CONN_MAX_AGE'], options.get('transaction_mode', 'DEFERRED'),
+        )
+
+    def drive(self, user, lot_ids, ops, threads, write_ratio):
+        amounts = itertools.count(1)
+        lock = threading.Lock()
+        reads, writes, errors = [], [], []
+        horizon = timezone.now() + timedelta(days=1)
+
+        def worker(count):
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    try:
+                        if random.random() < write_ratio:
+                            with lock:
+                                amount = Decimal(next(amounts))
+                            accept_bid(user, random.choice(lot_ids), amount)
+                            timings = writes
+                        else:
+                            after = horizon + timedelta(seconds=random.randint(0, len(lot_ids)))
+                            live = Item.objects.filter(auction_end_time__gte=after).only(
+                                'id', 'name', 'auction_end_time', 'current_bid',
+                            )
+                            keyset_page(live, 24)
+                            timings = reads
+                    except OperationalError:
+                        # Busy errors that got past retry_on_busy.
+                        timings = errors
+                    timings.append(time.perf_counter() - started)
+                    # What the end of a request does: close per-request
+                    # connections, keep persistent ones.
+                    close_old_connections()
+            finally:
+                connections.close_all()
+
+        share, extra = divmod(ops, threads)
+        pool = [threading.Thread(target=worker, args=(share + (n < extra),)) for n in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return ops / (time.perf_counter() - started), reads, writes, errors
+
+    def report(self, result):
+        throughput, reads, writes, errors = result
+        self.stdout.write(
+            '  %8.1f ops/s  reads %6d p99 %7.2fms  bids %5d p50 %7.2fms p99 %7.2fms  busy errors %d' % (
+                throughput, len(reads), percentile(reads, 0.99) * 1000,
+                len(writes), percentile(writes, 0.5) * 1000, percentile(writes, 0.99) * 1000, len(errors),
+            ))
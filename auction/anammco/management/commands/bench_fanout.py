@@ -0,0 +1,71 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from anammco.management.bench import percentile
+from anammco.realtime import Broker, EventRouter
+
+
+async def not_found(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class Command(BaseCommand):
+    help = 'Measure price-change fan-out latency to many connected SSE clients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def handle(self, *args, clients, rounds, **options):
+        for count in clients:
+            stats = asyncio.run(self.run(count, rounds))
+            self.stdout.write(
+                '%6d clients: publish %.2fms  delivery p50 %.2fms  p99 %.2fms  max %.2fms'
+                % (count, stats['publish'], stats['p50'], stats['p99'], stats['max'])
+            )
+
+    async def run(self, count, rounds):
+        """Connect ``count`` clients to one item through the ASGI router."""
+        broker = Broker()
+        router = EventRouter(not_found, broker)
+        hang_up = asyncio.Event()
+        latencies = []
+        published = {}
+        delivered = asyncio.Event()
+
+        async def receive():
+            await hang_up.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message.get('body', b'').startswith(b'data:'):
+                latencies.append(time.perf_counter() - published['at'])
+                if len(latencies) == published['expected']:
+                    delivered.set()
+
+        scope = {'type': 'http', 'path': '/events/1/', 'query_string': b''}
+        connections = [asyncio.ensure_future(router(scope, receive, send)) for _ in range(count)]
+        while broker.subscriber_count(1) < count:
+            await asyncio.sleep(0.01)
+
+        publish_times = []
+        for n in range(rounds):
+            delivered.clear()
+            published['expected'] = count * (n + 1)
+            published['at'] = time.perf_counter()
+            broker.publish(1, current_bid=n)
+            publish_times.append(time.perf_counter() - published['at'])
+            await delivered.wait()
+
+        hang_up.set()
+        await asyncio.gather(*connections)
+        return {
+            'publish': statistics.mean(publish_times) * 1000,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': max(latencies) * 1000,
+        }
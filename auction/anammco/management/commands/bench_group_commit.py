@@ -0,0 +1,74 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from anammco.bidding import accept_bid
+from anammco.ingest import GroupCommitWriter
+from anammco.management.bench import percentile
+from anammco.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Compare per-bid commits with group commit at several batch sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bids', type=int, default=3000)
+        parser.add_argument('--clients', type=int, default=64)
+        parser.add_argument('--items', type=int, default=100)
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 32, 128])
+        parser.add_argument('--max-delay-ms', type=float, default=5)
+
+    def handle(self, *args, bids, clients, items, batch_sizes, max_delay_ms, **options):
+        user, _ = get_user_model().objects.get_or_create(username='bench-bidder')
+        end = timezone.now() + timedelta(hours=1)
+        lots = Item.objects.bulk_create([
+            Item(name='Benchmark lot %d' % n, description='', current_bid=0, auction_end_time=end)
+            for n in range(items)
+        ])
+        lot_ids = [lot.pk for lot in lots]
+        amounts = itertools.count(1)
+        lock = threading.Lock()
+
+        def next_bid():
+            with lock:
+                n = next(amounts)
+            return lot_ids[n % len(lot_ids)], Decimal(n)
+
+        try:
+            self.report('per-bid commit', self.drive(bids, clients, lambda: accept_bid(user, *next_bid())))
+            for size in batch_sizes:
+                writer = GroupCommitWriter(batch_size=size, max_delay=max_delay_ms / 1000)
+                try:
+                    self.report('group commit %4d' % size, self.drive(
+                        bids, clients, lambda: writer.submit(user, *next_bid()).result(),
+                    ))
+                finally:
+                    writer.stop()
+        finally:
+            Item.objects.filter(pk__in=lot_ids).delete()
+
+    def drive(self, bids, clients, bid):
+        latencies = []
+
+        def timed(_):
+            started = time.perf_counter()
+            bid()
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(timed, range(bids)))
+        return bids / (time.perf_counter() - started), latencies
+
+    def report(self, label, result):
+        throughput, latencies = result
+        self.stdout.write('%-18s %8.1f bids/s  p50 %7.2fms  p99 %7.2fms' % (
+            label, throughput, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000,
+        ))
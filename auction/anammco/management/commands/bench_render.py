@@ -0,0 +1,62 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from anammco.models import Item
+from anammco.pagination import KeysetPage
+from anammco.views import LIST_TEMPLATE
+
+
+class Command(BaseCommand):
+    help = 'Time auction_list renders with and without per-lot fragment caching.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, nargs='+', default=[50, 500, 5000])
+        parser.add_argument('--renders', type=int, default=20)
+        parser.add_argument('--moved', type=float, default=0.02,
+                            help='Fraction of lots whose price moves between renders.')
+
+    def handle(self, *args, items, renders, moved, **options):
+        request = RequestFactory().get('/auction-list/')
+        request.user = get_user_model()(username='bench')
+        for count in items:
+            lots = self.lots(count)
+            before = self.time(request, lots, renders, moved, ttl=0)
+            caches['template_fragments'].clear()
+            after = self.time(request, lots, renders, moved, ttl=600)
+            self.stdout.write('%5d items: %8.2fms uncached  %8.2fms fragment-cached  (%.1fx)' % (
+                count, before * 1000, after * 1000, before / after,
+            ))
+
+    def lots(self, count):
+        end = timezone.now() + timedelta(days=1)
+        lots = []
+        for pk in range(1, count + 1):
+            item = Item(
+                pk=pk, name='Lot %d' % pk, description='Fleet disposal vehicle number %d' % pk,
+                current_bid=Decimal(pk * 1000), auction_end_time=end,
+            )
+            item.version = 0
+            lots.append(item)
+        return lots
+
+    def time(self, request, lots, renders, moved, ttl):
+        context = {'items': lots, 'page': KeysetPage(lots), 'lot_cache_ttl': ttl}
+        render_to_string(LIST_TEMPLATE, context, request)
+        elapsed = 0.0
+        for _ in range(renders):
+            for item in random.sample(lots, int(len(lots) * moved)):
+                item.current_bid += 1000
+                item.version += 1
+            started = time.perf_counter()
+            render_to_string(LIST_TEMPLATE, context, request)
+            elapsed += time.perf_counter() - started
+        return elapsed / renders
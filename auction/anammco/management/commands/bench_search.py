@@ -0,0 +1,73 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from anammco.management.bench import percentile
+from anammco.models import Item
+from anammco.search import search_items
+
+PREFIX = 'bench-search '
+MAKES = ['Innoson', 'Toyota', 'Peugeot', 'Mercedes', 'Dodge', 'Ford', 'Honda', 'Mitsubishi', 'Nissan', 'Iveco']
+KINDS = ['truck', 'tipper', 'bus', 'pickup', 'saloon', 'tanker', 'trailer', 'jeep', 'van', 'crane']
+WORDS = ['fleet', 'disposal', 'diesel', 'petrol', 'manual', 'automatic', 'registered', 'tokunbo',
+         'accident', 'free', 'engine', 'gearbox', 'tyres', 'leather', 'seats', 'chassis', 'Nnewi',
+         'Lagos', 'Abuja', 'construction', 'haulage', 'government', 'tested', 'clean']
+QUERIES = ['truck', 'innoson tipper', 'tru', 'merc', 'toyota hilux diesel', 'nnewi fleet disposal', 'ab']
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark search_items(), first page and following cursor pages, against '
+        'synthetic lots seeded into the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--pages', type=int, default=5, help='Pages to walk per query.')
+        parser.add_argument('--ended', type=float, default=0.2,
+                            help='Share of seeded lots that have already ended.')
+
+    def handle(self, *args, rows, repeat, page_size, pages, ended, **options):
+        self.seed(rows, ended)
+        try:
+            for query in QUERIES:
+                first, later, hits = [], [], 0
+                for _ in range(repeat):
+                    after, hits = None, 0
+                    for page in range(pages):
+                        started = time.perf_counter()
+                        items, after = search_items(query, page_size, after=after)
+                        (later if page else first).append(time.perf_counter() - started)
+                        hits += len(items)
+                        if after is None:
+                            break
+                self.stdout.write('%-24r %4d hits  page 1 p50 %7.2fms p99 %7.2fms  later p50 %7.2fms p99 %7.2fms' % (
+                    query, hits, percentile(first, 0.5) * 1000, percentile(first, 0.99) * 1000,
+                    percentile(later, 0.5) * 1000, percentile(later, 0.99) * 1000,
+                ))
+        finally:
+            Item.objects.filter(name__startswith=PREFIX).delete()
+
+    def seed(self, rows, ended):
+        # Inserted through the ORM, so the FTS triggers index them as they
+        # would real lots; some have ended, which the search must skip.
+        rng = random.Random(42)
+        now = timezone.now()
+        started = time.perf_counter()
+        batch = []
+        for n in range(rows):
+            ends = now - timedelta(hours=1) if rng.random() < ended else now + timedelta(days=1, seconds=n)
+            batch.append(Item(
+                name='%s%s %s %d' % (PREFIX, rng.choice(MAKES), rng.choice(KINDS), rng.randint(1990, 2023)),
+                description=' '.join(rng.sample(WORDS, 8)), current_bid=0, auction_end_time=ends,
+            ))
+            if len(batch) == 10000:
+                Item.objects.bulk_create(batch)
+                batch = []
+        Item.objects.bulk_create(batch)
+        self.stdout.write('seeded and indexed %d lots in %.1fs' % (rows, time.perf_counter() - started))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from anammco.closing import AuctionCloser
+
+
+class Command(BaseCommand):
+    help = 'Close auctions exactly at auction_end_time and record the winning bid.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Settle what is already due and exit.')
+        parser.add_argument('--refresh', type=float, default=60,
+                            help='Seconds between checks for newly created lots.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, once, refresh, batch_size, **options):
+        closer = AuctionCloser(batch_size=batch_size)
+        if once:
+            loaded = closer.load()
+            settled, lag = closer.close_due()
+            self.stdout.write('%d lots scheduled, %d settled' % (loaded, settled))
+            return
+        self.stdout.write('Closing auctions (refresh every %ss). Quit with CONTROL-C.' % refresh)
+        try:
+            closer.run(refresh=refresh, log=self.report)
+        except KeyboardInterrupt:
+            pass
+
+    def report(self, settled, lag, pending):
+        self.stdout.write('settled %d lots, %.3fs after deadline, %d pending' % (settled, lag, pending))
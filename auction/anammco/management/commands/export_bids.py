@@ -0,0 +1,33 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from anammco.exports import STREAMS, export_queryset, gzip_stream, last_bid_id
+
+
+class Command(BaseCommand):
+    help = 'Stream bid history as CSV or NDJSON to a file or stdout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(STREAMS), default='csv')
+        parser.add_argument('--day', type=date.fromisoformat, help='Only lots ending on this day (YYYY-MM-DD).')
+        parser.add_argument('--after', type=int, help='Resume after this bid id.')
+        parser.add_argument('--until', type=int, help='Stop at this bid id (default: the latest now).')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout).')
+
+    def handle(self, *args, format, day, after, until, gzip, output, **options):
+        until = until if until is not None else last_bid_id()
+        pieces = STREAMS[format][0](export_queryset(day, after, until))
+        if gzip:
+            pieces = gzip_stream(pieces)
+        out = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for piece in pieces:
+                out.write(piece)
+        finally:
+            if output:
+                out.close()
+        if output:
+            self.stderr.write('Exported bids up to id %d to %s' % (until, output))
@@ -0,0 +1,55 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from anammco.lots import READERS, LotImporter
+
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'json'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Import lots from a CSV, NDJSON or JSON-array file (or - for stdin), upserting on lot_number. '
+        'Columns: lot_number, name, description, current_bid, auction_end_time (ISO 8601).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(READERS))
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per transaction.')
+        parser.add_argument('--max-errors', type=int, default=1000,
+                            help='Stop at the first invalid row past this many.')
+
+    def handle(self, *args, path, format, chunk_size, max_errors, **options):
+        format = format or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if format is None:
+            raise CommandError('Cannot tell the format of %s; pass --format.' % path)
+        importer = LotImporter(chunk_size=chunk_size, max_errors=max_errors)
+        where = 'item' if format == 'json' else 'line'
+        reported = 0
+
+        def report_errors():
+            nonlocal reported
+            for position, message in importer.errors[reported:]:
+                self.stderr.write('%s %d: %s' % (where, position, message))
+            reported = len(importer.errors)
+
+        def progress(rows, seconds):
+            report_errors()
+            if options['verbosity'] > 1:
+                self.stdout.write('%d rows, %.0f rows/s' % (rows, rows / seconds))
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            rows, seconds = importer.run(READERS[format](stream), progress)
+        except ValueError as exc:
+            report_errors()
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        progress(rows, seconds or 1)
+        self.stdout.write('%d rows in %.1fs (%.0f rows/s): %d created, %d updated, %d rejected' % (
+            rows, seconds, rows / (seconds or 1), importer.created, importer.updated, importer.rejected,
+        ))
@@ -0,0 +1,259 @@
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from http.client import HTTPConnection
+from io import BytesIO
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from anammco.bid_cache import bid_cache
+from anammco.management.bench import percentile
+from anammco.models import Item, Bid
+from anammco.ratelimit import limiter
+
+PREFIX = 'loadtest-'
+# An unmasked CSRF secret is accepted in both the cookie and the header.
+CSRF_SECRET = 'l' * 32
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class InProcess:
+    """Call the WSGI handler directly: measures Django, not the network."""
+
+    def __init__(self):
+        self.handler = WSGIHandler()
+
+    def request(self, method, path, cookies, body=b''):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookies, 'HTTP_ACCEPT': 'application/json',
+            'HTTP_X_CSRFTOKEN': CSRF_SECRET, 'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)), 'wsgi.input': BytesIO(body), 'wsgi.errors': BytesIO(),
+            'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+            'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        status = []
+        chunks = self.handler(environ, lambda line, headers, exc_info=None: status.append(line))
+        try:
+            content = b''.join(chunks)
+        finally:
+            getattr(chunks, 'close', lambda: None)()
+        return int(status[0].split()[0]), content
+
+
+class OverSocket:
+    """A threaded wsgiref server on a free local port, one client connection per request."""
+
+    def __init__(self):
+        self.server = make_server('127.0.0.1', 0, WSGIHandler(), ThreadingWSGIServer, QuietHandler)
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def request(self, method, path, cookies, body=b''):
+        conn = HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            conn.request(method, path, body=body or None, headers={
+                'Host': 'localhost', 'Cookie': cookies, 'Accept': 'application/json',
+                'X-CSRFToken': CSRF_SECRET, 'Content-Type': 'application/x-www-form-urlencoded',
+            })
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic users, lots and bids, then load the list and bid views and report latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--bids', type=int, default=20000, help='Historical bids to seed.')
+        parser.add_argument('--requests', type=int, default=5000, help='Requests per transport.')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--bid-ratio', type=float, default=0.2, help='Share of requests that are bids.')
+        parser.add_argument('--hot-items', type=int, default=50, help='Bids go to this many lots.')
+        parser.add_argument('--transport', choices=['inprocess', 'socket', 'both'], default='both')
+        parser.add_argument('--no-rate-limit', action='store_true', help='Switch the bid rate limits off.')
+        parser.add_argument('--keep', action='store_true', help='Leave the seeded data in place.')
+        parser.add_argument('--output', help='Write the report here as JSON.')
+
+    def handle(self, *args, **options):
+        report = {'config': {key: value for key, value in options.items() if key in (
+            'users', 'items', 'bids', 'requests', 'concurrency', 'bid_ratio', 'hot_items', 'no_rate_limit',
+        )}, 'started': timezone.now().isoformat(), 'results': {}}
+        limits = limiter.limits
+        if options['no_rate_limit']:
+            limiter.limits = {}
+        users, item_ids = self.seed(options['users'], options['items'], options['bids'])
+        try:
+            sessions = self.sessions(users[:max(options['concurrency'] * 4, 1)])
+            transports = ['inprocess', 'socket'] if options['transport'] == 'both' else [options['transport']]
+            for name in transports:
+                client = InProcess() if name == 'inprocess' else OverSocket()
+                try:
+                    result = self.drive(client, sessions, item_ids, options)
+                finally:
+                    getattr(client, 'close', lambda: None)()
+                report['results'][name] = result
+                self.stdout.write(
+                    '%-9s %8.1f req/s  list p50/p95/p99 %s  bid p50/p95/p99 %s  lost updates %d  statuses %s' % (
+                        name, result['throughput'],
+                        '/'.join('%.1f' % result['list'][p] for p in ('p50', 'p95', 'p99')),
+                        '/'.join('%.1f' % result['bid'][p] for p in ('p50', 'p95', 'p99')),
+                        result['lost_updates'], result['statuses'],
+                    )
+                )
+        finally:
+            limiter.limits = limits
+            if not options['keep']:
+                self.unseed()
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump(report, out, indent=2)
+            self.stdout.write('Report written to %s' % options['output'])
+
+    def seed(self, users, items, bids):
+        self.unseed()
+        User = get_user_model()
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username='%s%d' % (PREFIX, n), password=password) for n in range(users)], batch_size=1000,
+        )
+        users = list(User.objects.filter(username__startswith=PREFIX))
+        end = timezone.now() + timedelta(days=1)
+        Item.objects.bulk_create([
+            Item(name='%sLot %d' % (PREFIX, n), description='Synthetic lot %d' % n, current_bid=Decimal('0.00'),
+                 auction_end_time=end + timedelta(seconds=n))
+            for n in range(items)
+        ], batch_size=1000)
+        item_ids = list(Item.objects.filter(name__startswith=PREFIX).values_list('pk', flat=True))
+        prices = defaultdict(Decimal)
+        history = []
+        for n in range(bids):
+            item_id = random.choice(item_ids)
+            prices[item_id] += Decimal(random.randint(1, 50))
+            history.append(Bid(bidder=random.choice(users), item_id=item_id, bid_amount=prices[item_id]))
+        Bid.objects.bulk_create(history, batch_size=1000)
+        for item_id, price in prices.items():
+            Item.objects.filter(pk=item_id).update(current_bid=price)
+        bid_cache.invalidate_many(list(prices))
+        return users, item_ids
+
+    def unseed(self):
+        Item.objects.filter(name__startswith=PREFIX).delete()
+        get_user_model().objects.filter(username__startswith=PREFIX).delete()
+
+    def sessions(self, users):
+        """Log ``users`` in by writing their sessions directly; return cookie headers."""
+        SessionStore = import_string(settings.SESSION_ENGINE + '.SessionStore')
+        backend = settings.AUTHENTICATION_BACKENDS[0]
+        cookies = []
+        for user in users:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = backend
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            cookies.append('%s=%s; %s=%s' % (
+                settings.SESSION_COOKIE_NAME, session.session_key, settings.CSRF_COOKIE_NAME, CSRF_SECRET,
+            ))
+        return cookies
+
+    def drive(self, client, sessions, item_ids, options):
+        hot = random.sample(item_ids, min(options['hot_items'], len(item_ids)))
+        list_url = reverse('auction_list')
+        latencies = {'list': [], 'bid': []}
+        statuses = Counter()
+        accepted = defaultdict(Decimal)
+        accepted_count = Counter()
+        lock = threading.Lock()
+        start_bids = Bid.objects.filter(item_id__in=hot).count()
+        prices = dict(Item.objects.filter(pk__in=hot).values_list('pk', 'current_bid'))
+
+        def one(n):
+            cookies = sessions[n % len(sessions)]
+            if random.random() < options['bid_ratio']:
+                kind = 'bid'
+                item_id = random.choice(hot)
+                with lock:
+                    amount = prices[item_id] + random.randint(1, 20)
+                path, body = reverse('place_bid', args=[item_id]), urlencode({'bid_amount': amount}).encode()
+                method = 'POST'
+            else:
+                kind, method, path, body = 'list', 'GET', list_url, b''
+            started = time.perf_counter()
+            try:
+                status, content = client.request(method, path, cookies, body)
+            except OSError:
+                status, content = 0, b''
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[kind].append(elapsed)
+                statuses['%s %d' % (kind, status)] += 1
+                if kind == 'bid' and status == 200 and json.loads(content)['accepted']:
+                    accepted_count[item_id] += 1
+                    accepted[item_id] = max(accepted[item_id], amount)
+                    prices[item_id] = max(prices[item_id], amount)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(one, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        # Every accepted bid must be stored, and each lot must end on its highest accepted bid.
+        final = dict(Item.objects.filter(pk__in=accepted).values_list('pk', 'current_bid'))
+        stored = Bid.objects.filter(item_id__in=hot).count() - start_bids
+        lost = sum(1 for item_id, amount in accepted.items() if final.get(item_id) != amount)
+        lost += max(0, sum(accepted_count.values()) - stored)
+        return {
+            'requests': options['requests'],
+            'seconds': elapsed,
+            'throughput': options['requests'] / elapsed,
+            'list': self.summary(latencies['list']),
+            'bid': self.summary(latencies['bid']),
+            'statuses': dict(statuses),
+            'accepted_bids': sum(accepted_count.values()),
+            'stored_bids': stored,
+            'lost_updates': lost,
+        }
+
+    def summary(self, values):
+        if not values:
+            return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        return {
+            'count': len(values),
+            'p50': percentile(values, 0.50) * 1000,
+            'p95': percentile(values, 0.95) * 1000,
+            'p99': percentile(values, 0.99) * 1000,
+        }
@@ -0,0 +1,23 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Refresh the local SQLite read replicas with a consistent copy of the primary.'
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in settings.ANAMMCO_READ_REPLICAS:
+            target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+            try:
+                # The backup API copies a consistent snapshot even while bids
+                # are being written.
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            connections[alias].close()
+            self.stdout.write('%s <- %s' % (alias, settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']))
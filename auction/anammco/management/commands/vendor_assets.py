@@ -0,0 +1,133 @@
+import os
+import re
+from urllib.parse import urljoin, urlsplit
+from urllib.request import Request, urlopen
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+# {% asset 'local/path' 'https://cdn/url' %}
+ASSET_TAG = re.compile(r"""{%\s*asset\s+['"]([^'"]+)['"]\s+['"]([^'"]+)['"]\s*%}""")
+CSS_URL = re.compile(r"""url\(\s*['"]?([^'")]+)['"]?\s*\)""")
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+WORD = re.compile(r'[\w-]+')
+# Google Fonts only offers woff2 to browsers it recognises.
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+def fetch(url):
+    with urlopen(Request(url, headers={'User-Agent': USER_AGENT}), timeout=30) as response:
+        return response.read()
+
+
+def _block_end(css, start):
+    depth = 0
+    for index in range(start, len(css)):
+        if css[index] == '{':
+            depth += 1
+        elif css[index] == '}':
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(css) - 1
+
+
+def strip_unused(css, used):
+    """Drop selectors naming a class that appears nowhere in ``used``.
+
+    ``used`` is every word in the templates, so anything that might be a
+    class name survives; @font-face, @keyframes and friends are kept whole.
+    """
+    css = CSS_COMMENT.sub('', css)
+    out = []
+    position = 0
+    while True:
+        brace = css.find('{', position)
+        semicolon = css.find(';', position)
+        if brace == -1:
+            break
+        if -1 < semicolon < brace and css[position:semicolon].strip().startswith('@'):
+            out.append(css[position:semicolon + 1].strip())  # @charset, @import
+            position = semicolon + 1
+            continue
+        end = _block_end(css, brace)
+        prelude, body = css[position:brace].strip(), css[brace + 1:end]
+        position = end + 1
+        if prelude.startswith(('@media', '@supports')):
+            inner = strip_unused(body, used)
+            if inner:
+                out.append('%s{%s}' % (prelude, inner))
+        elif prelude.startswith('@'):
+            out.append('%s{%s}' % (prelude, body))
+        else:
+            selectors = [
+                selector.strip() for selector in prelude.split(',')
+                if all(name in used for name in CSS_CLASS.findall(selector))
+            ]
+            if selectors:
+                out.append('%s{%s}' % (','.join(selectors), body.strip()))
+    return '\n'.join(out)
+
+
+class Command(BaseCommand):
+    help = 'Download the CDN assets named by {% asset %} tags into the app\'s static files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dest', help='Static directory to write to (default: the app\'s static/).')
+        parser.add_argument('--keep-unused-css', action='store_true')
+
+    def handle(self, *args, dest, keep_unused_css, **options):
+        dest = dest or os.path.join(apps.get_app_config('anammco').path, 'static')
+        sources = self.template_sources()
+        assets = dict(match for text in sources for match in ASSET_TAG.findall(text))
+        if not assets:
+            raise CommandError('No {% asset %} tags found in the templates.')
+        used = {word for text in sources for word in WORD.findall(text)}
+        for path, url in sorted(assets.items()):
+            target = os.path.join(dest, *path.split('/'))
+            data = fetch(url)
+            before = len(data)
+            if path.endswith('.css'):
+                css = self.vendor_fonts(data.decode('utf-8'), url, target)
+                if not keep_unused_css:
+                    css = strip_unused(css, used)
+                data = css.encode('utf-8')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as out:
+                out.write(data)
+            self.stdout.write('%s  %d -> %d bytes' % (path, before, len(data)))
+        self.stdout.write('Run collectstatic to fingerprint and compress them.')
+
+    def template_sources(self):
+        sources = []
+        for engine in engines.all():
+            for directory in engine.template_dirs:
+                for root, _, names in os.walk(directory):
+                    for name in names:
+                        if name.endswith(('.html', '.txt')):
+                            with open(os.path.join(root, name), encoding='utf-8') as template:
+                                sources.append(template.read())
+        return sources
+
+    def vendor_fonts(self, css, url, target):
+        """Download what ``css`` references and point it at the local copies."""
+        fonts = os.path.join(os.path.dirname(target), 'fonts')
+
+        def localise(match):
+            reference = match.group(1)
+            if reference.startswith('data:'):
+                return match.group(0)
+            absolute = urljoin(url, reference)
+            name = os.path.basename(urlsplit(absolute).path)
+            local = os.path.join(fonts, name)
+            if not os.path.exists(local):
+                os.makedirs(fonts, exist_ok=True)
+                with open(local, 'wb') as out:
+                    out.write(fetch(absolute))
+            # Keep any #fragment (svg fonts); the query string only busted caches.
+            fragment = urlsplit(reference).fragment
+            return 'url("fonts/%s%s")' % (name, '#' + fragment if fragment else '')
+
+        return CSS_URL.sub(localise, css)
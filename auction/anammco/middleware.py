@@ -0,0 +1,113 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import perf
+from .routers import pinned_to_primary
+
+PIN_COOKIE = 'anammco_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinMiddleware:
+    """Read your own writes: pin a browser to the primary after it POSTs.
+
+    Any unsafe request (a bid, an admin edit) sets a short-lived cookie; while
+    it is valid the router sends that browser's reads to the primary.
+    Async-capable, so it never forces async views onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = pinned_to_primary.set(self.pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            pinned_to_primary.reset(token)
+        return self.set_pin(request, response)
+
+    async def __acall__(self, request):
+        token = pinned_to_primary.set(self.pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            pinned_to_primary.reset(token)
+        return self.set_pin(request, response)
+
+    def pinned(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def set_pin(self, request, response):
+        if request.method not in SAFE_METHODS:
+            window = settings.ANAMMCO_REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, '%.3f' % (time.time() + window), max_age=window,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class PerfMiddleware:
+    """Time sampled requests; report them in ``Server-Timing`` and ``perf.histograms``.
+
+    Goes first in ``MIDDLEWARE``: ``mw`` is the time until the view
+    middleware runs, ``view`` the rest (CSRF checks included).
+    ``ANAMMCO_PERF_SAMPLE_RATE`` picks the share of requests timed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not perf.sampled():
+            return self.get_response(request)
+        timing = perf.RequestTiming()
+        token = perf.start(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.stop(token)
+        return self.report(request, response, timing)
+
+    async def __acall__(self, request):
+        if not perf.sampled():
+            return await self.get_response(request)
+        timing = perf.RequestTiming()
+        token = perf.start(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            perf.stop(token)
+        return self.report(request, response, timing)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = perf.current()
+        if timing is not None:
+            timing.view_started = time.perf_counter()
+
+    def report(self, request, response, timing):
+        timing.finish()
+        match = request.resolver_match
+        perf.histograms.record(match.view_name if match else 'unresolved', timing)
+        response['Server-Timing'] = timing.header()
+        return response
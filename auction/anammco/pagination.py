@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+ORDERING = ('auction_end_time', 'pk')
+
+
+def encode_cursor(item):
+    raw = '%s|%d' % (item.auction_end_time.isoformat(), item.pk)
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(token):
+    """Return ``(auction_end_time, pk)`` from a cursor, or None if it is garbage."""
+    try:
+        end_time, pk = urlsafe_base64_decode(token).decode().split('|')
+        return datetime.fromisoformat(end_time), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_page(queryset, size, after=None, before=None):
+    """Slice ``queryset`` by ``(auction_end_time, id)`` instead of OFFSET.
+
+    Each page starts with an index seek to the cursor position, so page N
+    costs the same as page 1.  ``after``/``before`` are opaque cursors
+    produced by ``encode_cursor``.
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+    if before is not None:
+        end_time, pk = before
+        queryset = queryset.filter(auction_end_time__lte=end_time).filter(
+            Q(auction_end_time__lt=end_time) | Q(pk__lt=pk)
+        )
+        rows = list(queryset.order_by('-auction_end_time', '-pk')[:size + 1])
+        has_more = len(rows) > size
+        items = rows[:size][::-1]
+        return KeysetPage(
+            items,
+            next_cursor=encode_cursor(items[-1]) if items else None,
+            previous_cursor=encode_cursor(items[0]) if has_more else None,
+        )
+    if after is not None:
+        end_time, pk = after
+        queryset = queryset.filter(auction_end_time__gte=end_time).filter(
+            Q(auction_end_time__gt=end_time) | Q(pk__gt=pk)
+        )
+    rows = list(queryset.order_by(*ORDERING)[:size + 1])
+    items = rows[:size]
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if len(rows) > size else None,
+        previous_cursor=encode_cursor(items[0]) if after is not None and items else None,
+    )
+
+
+def estimated_count(model, using):
+    """The planner's row estimate for ``model``'s table, or None if unavailable."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table],
+            )
+        elif connection.vendor == 'sqlite':
+            # No statistics, but the largest rowid is an index seek and
+            # overestimates only by the rows deleted since.
+            cursor.execute('SELECT MAX(rowid) FROM %s' % connection.ops.quote_name(table))
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:  # reltuples is -1 before the first ANALYZE.
+        return None
+    return int(row[0])
+
+
+class ApproximateCountPaginator(Paginator):
+    """A paginator that never counts a big table row by row.
+
+    Unfiltered querysets over ``threshold`` rows use the database's
+    estimate; filtered ones are counted exactly up to ``cap`` rows, and
+    ``approximate`` says when the count is a lower bound or an estimate.
+    """
+
+    threshold = 50000
+    cap = 10000
+    approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.threshold:
+                self.approximate = True
+                return estimate
+        # Count primary keys only, so annotations aren't computed per row.
+        count = queryset.order_by().values('pk')[:self.cap + 1].count()
+        self.approximate = count > self.cap
+        return min(count, self.cap)
@@ -0,0 +1,136 @@
+"""
+Sampled per-request timing: SQL, template rendering, and the time spent
+in middleware versus the view.
+
+The SQL timer sits permanently on every connection and the template
+backend always checks for a recorder, but both are a single ContextVar
+lookup unless the request was sampled, so this can stay on in production.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# SQL touching these tables is reported under its own phase.
+SQL_PHASES = (('django_session', 'session'), ('auth_', 'auth'))
+
+_current = ContextVar('anammco_request_timing', default=None)
+
+
+class RequestTiming:
+    """Durations (seconds) and query counts for one sampled request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.durations = defaultdict(float)
+        self.queries = defaultdict(int)
+
+    def add(self, phase, seconds):
+        self.durations[phase] += seconds
+
+    def add_query(self, sql, seconds):
+        phase = next((name for table, name in SQL_PHASES if table in sql), 'db')
+        self.durations[phase] += seconds
+        self.queries[phase] += 1
+
+    def finish(self):
+        now = time.perf_counter()
+        view_started = self.view_started or now
+        self.durations['mw'] = view_started - self.started
+        self.durations['view'] = now - view_started
+        self.durations['total'] = now - self.started
+
+    def header(self):
+        parts = []
+        for phase, seconds in self.durations.items():
+            part = '%s;dur=%.2f' % (phase, seconds * 1000)
+            if phase in self.queries:
+                part += ';desc="%d queries"' % self.queries[phase]
+            parts.append(part)
+        return ', '.join(parts)
+
+
+def sampled():
+    rate = getattr(settings, 'ANAMMCO_PERF_SAMPLE_RATE', 0)
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def start(timing):
+    return _current.set(timing)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def sql_timer(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - started)
+
+
+def install_sql_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver: time every query on ``connection``."""
+    if sql_timer not in connection.execute_wrappers:
+        # At the front, so execute_wrapper() blocks can still pop their own.
+        connection.execute_wrappers.insert(0, sql_timer)
+
+
+class Histograms:
+    """Per-view, per-phase latency histograms for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: defaultdict(lambda: {
+            'count': 0, 'sum_ms': 0.0, 'buckets': [0] * (len(BUCKETS) + 1),
+        }))
+        self._queries = defaultdict(int)
+
+    def record(self, view, timing):
+        with self._lock:
+            phases = self._views[view]
+            for phase, seconds in timing.durations.items():
+                ms = seconds * 1000
+                entry = phases[phase]
+                entry['count'] += 1
+                entry['sum_ms'] += ms
+                entry['buckets'][bisect_left(BUCKETS, ms)] += 1
+            self._queries[view] += sum(timing.queries.values())
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets_ms': list(BUCKETS),
+                'views': {
+                    view: {
+                        'queries': self._queries[view],
+                        'phases': {phase: dict(entry, buckets=list(entry['buckets'])) for phase, entry in phases.items()},
+                    }
+                    for view, phases in self._views.items()
+                },
+            }
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+            self._queries.clear()
+
+
+histograms = Histograms()
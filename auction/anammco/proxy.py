@@ -0,0 +1,136 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, router, transaction
+
+from .bidding import CENT, accept_bid
+from .models import Item, Bid
+
+PROXY_TABLE = 'anammco_proxybid'
+# How often resolve_proxies looks again after being outbid mid-way.
+PROXY_ATTEMPTS = 3
+
+
+def proxy_ddl(connection):
+    quote = connection.ops.quote_name
+    table = quote(PROXY_TABLE)
+    return [
+        'CREATE TABLE IF NOT EXISTS %s ('
+        'id %s NOT NULL PRIMARY KEY %s, '
+        'item_id bigint NOT NULL, '
+        'bidder_id bigint NOT NULL, '
+        'max_amount %s NOT NULL, '
+        'UNIQUE (item_id, bidder_id))' % (
+            table,
+            connection.data_types['BigAutoField'],
+            connection.data_types_suffix.get('BigAutoField', ''),
+            connection.data_types['DecimalField'] % {'max_digits': 14, 'decimal_places': 2},
+        ),
+        # Per-item max-heap: the two strongest proxies are the first two
+        # entries of this index, found in O(log n).
+        'CREATE INDEX IF NOT EXISTS %s ON %s (item_id, max_amount DESC, id)' % (
+            quote('anammco_proxybid_top'), table,
+        ),
+    ]
+
+
+def _increment():
+    return Decimal(str(getattr(settings, 'ANAMMCO_BID_INCREMENT', '1000')))
+
+
+def _connection():
+    return connections[router.db_for_write(Item)]
+
+
+def set_proxy(user, item_id, max_amount):
+    """Store (or replace) ``user``'s maximum for ``item_id``."""
+    connection = _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO %s (item_id, bidder_id, max_amount) VALUES (%%s, %%s, %%s) '
+            'ON CONFLICT (item_id, bidder_id) DO UPDATE SET max_amount = excluded.max_amount'
+            % connection.ops.quote_name(PROXY_TABLE),
+            [item_id, user.pk, connection.ops.adapt_decimalfield_value(max_amount, 14, 2)],
+        )
+
+
+def has_proxies(item_id):
+    """Whether anyone has a proxy on ``item_id``: one indexed read, no lock."""
+    connection = _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM %s WHERE item_id = %%s LIMIT 1' % connection.ops.quote_name(PROXY_TABLE),
+            [item_id],
+        )
+        return cursor.fetchone() is not None
+
+
+def strongest_proxies(item_id):
+    """Return up to two ``(bidder_id, max_amount)``, strongest first.
+
+    Ties go to whoever registered their proxy first.
+    """
+    connection = _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT bidder_id, max_amount FROM %s WHERE item_id = %%s '
+            'ORDER BY max_amount DESC, id LIMIT 2' % connection.ops.quote_name(PROXY_TABLE),
+            [item_id],
+        )
+        return [(bidder_id, Decimal(str(amount)).quantize(CENT)) for bidder_id, amount in cursor.fetchall()]
+
+
+def proxy_price(current, leader, proxies, increment):
+    """Where the strongest proxy should stand, or None if it can't or needn't move.
+
+    The winner pays one increment over whatever it has to beat -- the
+    current bid or the runner-up's maximum -- but never more than its own
+    maximum.
+    """
+    if not proxies:
+        return None
+    bidder_id, maximum = proxies[0]
+    runner_up = proxies[1][1] if len(proxies) > 1 else None
+    if leader == bidder_id:
+        if runner_up is None:
+            return None
+        target = min(maximum, runner_up + increment)
+    else:
+        target = current + increment
+        if runner_up is not None:
+            target = max(target, runner_up + increment)
+        target = min(maximum, target)
+    return target if target > current else None
+
+
+def resolve_proxies(item_id, attempts=PROXY_ATTEMPTS):
+    """Settle every competing proxy on ``item_id`` with at most one new bid.
+
+    Returns ``(price, extended_to)``: the new price when a proxy bid was
+    placed, otherwise None, and the deadline that bid moved the lot to
+    under soft close, if it did.  Most lots have no proxies, so that is
+    checked before taking the write lock a second time for the bid.
+    """
+    if not has_proxies(item_id):
+        return None, None
+    using = router.db_for_write(Item)
+    for _ in range(attempts):
+        with transaction.atomic(using=using):
+            proxies = strongest_proxies(item_id)
+            if not proxies:
+                return None, None
+            current = Item.objects.using(using).filter(pk=item_id).values_list('current_bid', flat=True).first()
+            if current is None:
+                return None, None
+            leader = Bid.objects.using(using).filter(item_id=item_id).order_by(
+                '-bid_amount', '-pk',
+            ).values_list('bidder_id', flat=True).first()
+            target = proxy_price(current, leader, proxies, _increment())
+            if target is None:
+                return None, None
+            outcome = accept_bid(get_user_model()(pk=proxies[0][0]), item_id, target)
+            if outcome:
+                return target, outcome.extended_to
+        # Someone outbid us between the read and the write; look again.
+    return None, None
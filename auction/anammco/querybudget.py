@@ -0,0 +1,151 @@
+"""
+Query budgets: a view declares the most queries it may run, whatever the
+data looks like, so N+1 patterns fail loudly instead of creeping in.
+Transaction control (BEGIN, SAVEPOINT, ...) isn't counted: it says how a
+view groups its work, not how much of it there is.
+
+Budgets are checked when ``DEBUG`` or ``ANAMMCO_ENFORCE_QUERY_BUDGETS`` is
+on, and always inside ``assert_query_budget`` (for tests).  In ``DEBUG``
+queries that repeat are also reported, with the code that ran them.
+"""
+import asyncio
+import logging
+import os
+import re
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('anammco_query_budget', default=None)
+
+# Call sites are reported from our code, not Django's internals.
+_APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+TRANSACTION_CONTROL = re.compile(r'\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|END)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    """Queries seen while a budget is active."""
+
+    def __init__(self, limit, name, trace, outer=None):
+        self.limit = limit
+        self.name = name
+        self.trace = trace
+        self.outer = outer
+        self.queries = []
+
+    def record(self, sql, params, site=None):
+        if site is None and self.trace:
+            site = _call_site()
+        self.queries.append((sql, repr(params), site))
+        if self.outer is not None:
+            # A test's budget still sees queries inside a view's own budget.
+            self.outer.record(sql, params, site)
+
+    def repeated(self, threshold=3):
+        """Return ``[(count, sql, call sites)]`` for SQL run ``threshold`` or more times.
+
+        Same SQL with different parameters counts too: that's the N+1 shape.
+        """
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return [
+            (count, sql, sorted({site for query, _, site in self.queries if query == sql and site}))
+            for sql, count in counts.most_common() if count >= threshold
+        ]
+
+    def report(self):
+        lines = ['%s ran %d queries, budget %d:' % (self.name, len(self.queries), self.limit)]
+        lines += ['  %s %s' % (sql, params) for sql, params, _ in self.queries]
+        for count, sql, sites in self.repeated():
+            lines.append('repeated %dx: %s' % (count, sql))
+            lines += ['  at %s' % site for site in sites]
+        return '\n'.join(lines)
+
+
+def _call_site():
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_APP_ROOT) and not frame.filename.endswith('querybudget.py'):
+            return '%s:%d in %s' % (os.path.relpath(frame.filename, _APP_ROOT), frame.lineno, frame.name)
+    return None
+
+
+def budget_wrapper(execute, sql, params, many, context):
+    log = _current.get()
+    if log is not None and not TRANSACTION_CONTROL.match(sql):
+        log.record(sql, params)
+    return execute(sql, params, many, context)
+
+
+def install_budget_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver: count queries on ``connection``."""
+    if budget_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, budget_wrapper)
+
+
+def _enforced():
+    return settings.DEBUG or getattr(settings, 'ANAMMCO_ENFORCE_QUERY_BUDGETS', False)
+
+
+class assert_query_budget:
+    """Context manager: fail if the block runs more than ``limit`` queries.
+
+    Usable in tests with any test client, sync or async.
+    """
+
+    def __init__(self, limit, name='block', trace=None):
+        self.limit = limit
+        self.name = name
+        self.trace = settings.DEBUG if trace is None else trace
+
+    def __enter__(self):
+        self.log = QueryLog(self.limit, self.name, self.trace, outer=_current.get())
+        self._token = _current.set(self.log)
+        return self.log
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc_type is not None:
+            return
+        if len(self.log.queries) > self.log.limit:
+            raise QueryBudgetExceeded(self.log.report())
+        if self.log.trace and self.log.repeated():
+            logger.warning(self.log.report())
+
+
+def query_budget(limit):
+    """Declare that a view runs at most ``limit`` queries, session and auth included."""
+    def decorator(view):
+        name = '%s.%s' % (view.__module__, view.__qualname__)
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                if not _enforced():
+                    return await view(request, *args, **kwargs)
+                with assert_query_budget(limit, name):
+                    return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapped(request, *args, **kwargs):
+                if not _enforced():
+                    return view(request, *args, **kwargs)
+                with assert_query_budget(limit, name):
+                    return view(request, *args, **kwargs)
+        wrapped.query_budget = limit
+        return wrapped
+    return decorator
+
+
+class QueryBudgetTestMixin:
+    """``self.assertQueryBudget(n)`` for TestCase classes."""
+
+    def assertQueryBudget(self, limit, name=None):
+        return assert_query_budget(limit, name or self.id(), trace=True)
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+class LocalBuckets:
+    """Token buckets held in this process, least recently used dropped first."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, requests):
+        """Spend a token from every ``(key, rate, burst)`` bucket, or from none.
+
+        Returns the position of the first bucket that is empty, or None
+        when all of them had a token.
+        """
+        now = time.monotonic()
+        with self._lock:
+            refilled = []
+            for key, rate, burst in requests:
+                tokens, last = self._buckets.pop(key, (burst, now))
+                refilled.append(min(burst, tokens + (now - last) * rate))
+            empty = next((n for n, tokens in enumerate(refilled) if tokens < 1), None)
+            for (key, _, _), tokens in zip(requests, refilled):
+                self._buckets[key] = (tokens - 1 if empty is None else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return empty
+
+
+class CacheBuckets:
+    """Buckets shared through a Django cache, so limits hold across workers.
+
+    A cache can't refill a bucket atomically, so this allows ``burst``
+    requests per ``burst / rate`` second window, which averages out to the
+    same rate.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, requests):
+        """Like ``LocalBuckets.take``.
+
+        Every counter is read before any is incremented, so a request one
+        scope turns away isn't charged to the others.  Two workers checking
+        at the same moment can both get through at the edge of a window.
+        """
+        slots = []
+        for key, rate, burst in requests:
+            window = max(1.0, burst / rate)
+            slots.append(('anammco:rl:%s:%d' % (key, time.time() // window), int(window) + 1, burst))
+        counts = self.cache.get_many([slot for slot, _, _ in slots])
+        for n, (slot, _, burst) in enumerate(slots):
+            if counts.get(slot, 0) >= burst:
+                return n
+        for slot, timeout, _ in slots:
+            self.cache.add(slot, 0, timeout)
+            try:
+                self.cache.incr(slot)
+            except ValueError:
+                pass
+        return None
+
+
+class BidRateLimiter:
+    def __init__(self, limits, backend=None):
+        self.limits = limits
+        self.buckets = CacheBuckets(backend) if backend else LocalBuckets()
+        self.rejected = Counter()
+        self._lock = threading.Lock()
+
+    def check(self, user_key, item_id):
+        """Return the scope that is over its limit, or None.
+
+        Tokens are only spent when every scope allows the bid.
+        """
+        scopes, requests = [], []
+        for scope, ident in (('user', user_key), ('item', item_id), ('global', '')):
+            limit = self.limits.get(scope)
+            if limit:
+                scopes.append(scope)
+                requests.append(('%s:%s' % (scope, ident),) + tuple(limit))
+        empty = self.buckets.take(requests) if requests else None
+        if empty is None:
+            return None
+        scope = scopes[empty]
+        with self._lock:
+            self.rejected[scope] += 1
+        return scope
+
+    def stats(self):
+        with self._lock:
+            return dict(self.rejected)
+
+
+def _from_settings():
+    return BidRateLimiter(
+        getattr(settings, 'ANAMMCO_BID_RATE_LIMITS', {}),
+        backend=getattr(settings, 'ANAMMCO_BID_RATE_LIMIT_BACKEND', None),
+    )
+
+
+limiter = _from_settings()
+
+
+def _over_limit(request, item_id):
+    if request.method != 'POST' or not request.user.is_authenticated:
+        return None
+    scope = limiter.check(request.user.pk, item_id)
+    if scope is None:
+        return None
+    response = HttpResponse('Too many bids (%s limit), slow down.' % scope, status=429)
+    response['Retry-After'] = '1'
+    return response
+
+
+def rate_limit_bids(view):
+    """Answer 429 to bids over the per-user, per-item or global limit.
+
+    Goes inside ``login_required``: only signed-in users' bids are counted,
+    keyed by user id, so anonymous requests with made-up session cookies
+    can't drain the per-item and global buckets.  Works on both sync and
+    async views.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapped(request, item_id, *args, **kwargs):
+            rejected = _over_limit(request, item_id)
+            if rejected is not None:
+                return rejected
+            return await view(request, item_id, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapped(request, item_id, *args, **kwargs):
+            rejected = _over_limit(request, item_id)
+            if rejected is not None:
+                return rejected
+            return view(request, item_id, *args, **kwargs)
+    return wrapped
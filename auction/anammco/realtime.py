@@ -0,0 +1,185 @@
+import asyncio
+import json
+import re
+import threading
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+MAX_ITEMS_PER_CONNECTION = 500
+
+
+class Subscription:
+    """One connected browser, watching one or more items.
+
+    Only the latest event per item is kept: a slow client that misses a few
+    price changes just gets the newest one, so a publish never blocks or
+    queues.
+    """
+
+    __slots__ = ('item_ids', 'loop', '_ready', '_pending')
+
+    def __init__(self, item_ids, loop):
+        self.item_ids = item_ids
+        self.loop = loop
+        self._ready = asyncio.Event()
+        self._pending = {}
+
+    def push(self, item_id, payload):
+        self._pending[item_id] = payload
+        self._ready.set()
+
+    async def next(self):
+        await self._ready.wait()
+        self._ready.clear()
+        payloads, self._pending = list(self._pending.values()), {}
+        return payloads
+
+
+class Broker:
+    """In-process per-item fan-out of price-change events.
+
+    Each subscription belongs to the event loop it subscribed from: the
+    ASGI server's loop, or under WSGI the loop of the request waiting on
+    it.  ``publish`` may be called from any thread; the event is encoded
+    once and handed to every subscriber on its own loop.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, item_ids):
+        subscription = Subscription(tuple(item_ids), asyncio.get_running_loop())
+        with self._lock:
+            for item_id in subscription.item_ids:
+                self._subscribers[item_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for item_id in subscription.item_ids:
+                subscribers = self._subscribers.get(item_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[item_id]
+
+    def subscriber_count(self, item_id):
+        return len(self._subscribers.get(item_id, ()))
+
+    def publish(self, item_id, **fields):
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(item_id, ()))
+        if not subscribers:
+            return
+        payload = json.dumps(dict(item=item_id, **fields), separators=(',', ':'), default=str).encode()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, subscriptions in by_loop.items():
+            if loop is running:
+                _push(subscriptions, item_id, payload)
+            elif not loop.is_closed():
+                try:
+                    loop.call_soon_threadsafe(_push, subscriptions, item_id, payload)
+                except RuntimeError:  # Closed since we looked.
+                    pass
+
+
+def _push(subscriptions, item_id, payload):
+    for subscription in subscriptions:
+        subscription.push(item_id, payload)
+
+
+broker = Broker()
+
+
+async def _until(receive, message_type):
+    while True:
+        message = await receive()
+        if message['type'] == message_type:
+            return
+
+
+async def _stream(subscription, receive, disconnect_type, send_payloads):
+    disconnected = asyncio.ensure_future(_until(receive, disconnect_type))
+    try:
+        while True:
+            pending = asyncio.ensure_future(subscription.next())
+            await asyncio.wait({pending, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                pending.cancel()
+                return
+            await send_payloads(pending.result())
+    finally:
+        disconnected.cancel()
+
+
+def _item_ids(scope, match):
+    if match.group(1):
+        return [int(match.group(1))]
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    raw = ','.join(query.get('items', []))
+    return sorted({int(part) for part in raw.split(',') if part.isdigit()})[:MAX_ITEMS_PER_CONNECTION]
+
+
+class EventRouter:
+    """ASGI application streaming price changes over SSE or WebSocket.
+
+    ``/events/<item_id>/`` watches one item and ``/events/?items=1,2,3``
+    watches several over a single connection.  Everything else is passed
+    through to the Django application.
+    """
+
+    path_re = re.compile(r'^/events/(?:(\d+)/)?$')
+
+    def __init__(self, application, broker=broker):
+        self.application = application
+        self.broker = broker
+
+    async def __call__(self, scope, receive, send):
+        match = self.path_re.match(scope.get('path', '')) if scope['type'] in ('http', 'websocket') else None
+        if match is None:
+            return await self.application(scope, receive, send)
+        subscription = self.broker.subscribe(_item_ids(scope, match))
+        try:
+            if scope['type'] == 'websocket':
+                await self.websocket(subscription, receive, send)
+            else:
+                await self.event_stream(subscription, receive, send)
+        finally:
+            self.broker.unsubscribe(subscription)
+
+    async def event_stream(self, subscription, receive, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+
+        async def send_payloads(payloads):
+            body = b''.join(b'data: ' + payload + b'\n\n' for payload in payloads)
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+        await _stream(subscription, receive, 'http.disconnect', send_payloads)
+
+    async def websocket(self, subscription, receive, send):
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        await send({'type': 'websocket.accept'})
+
+        async def send_payloads(payloads):
+            for payload in payloads:
+                await send({'type': 'websocket.send', 'text': payload.decode()})
+
+        await _stream(subscription, receive, 'websocket.disconnect', send_payloads)
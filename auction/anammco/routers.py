@@ -0,0 +1,33 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Set by ReplicaPinMiddleware for users who wrote something recently.
+pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+class PrimaryReplicaRouter:
+    """Read auction data from a replica, write everything to the primary.
+
+    Only this app's models (lots, bids) are read from
+    ``ANAMMCO_READ_REPLICAS``; sessions and users always come from the
+    primary so a fresh login is never lost to replica lag.  Requests pinned
+    by ``ReplicaPinMiddleware`` read from the primary too.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'ANAMMCO_READ_REPLICAS', [])
+        if not replicas or model._meta.app_label != 'anammco' or pinned_to_primary.get():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'ANAMMCO_READ_REPLICAS', [])
@@ -0,0 +1,37 @@
+from django.db import connections
+
+from .closing import settlement_ddl
+from .images import lotimage_ddl
+from .lots import lot_ddl
+from .models import Bid, Item
+from .proxy import proxy_ddl
+from .search import create_search_index
+
+# Indexes Django can't express without touching the model definitions.
+INDEXES = {
+    # Keyset pagination of the live auction list walks (auction_end_time, id).
+    'anammco_item_end_time_id': (Item, ('auction_end_time', 'id')),
+    # The admin's per-lot bid count and top bid read only this index.
+    'anammco_bid_item_amount': (Bid, ('item_id', 'bid_amount')),
+}
+
+
+def ensure_schema(using='default', **kwargs):
+    """Create the app's side tables and indexes, and on SQLite the lot search index.
+
+    Connected to ``post_migrate``.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(settlement_ddl(connection))
+        cursor.execute(lot_ddl(connection))
+        for statement in proxy_ddl(connection) + lotimage_ddl(connection):
+            cursor.execute(statement)
+        for name, (model, columns) in INDEXES.items():
+            cursor.execute('CREATE INDEX IF NOT EXISTS %s ON %s (%s)' % (
+                connection.ops.quote_name(name),
+                connection.ops.quote_name(model._meta.db_table),
+                ', '.join(connection.ops.quote_name(column) for column in columns),
+            ))
+        if connection.vendor == 'sqlite':
+            create_search_index(cursor, Item._meta.db_table)
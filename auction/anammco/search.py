@@ -0,0 +1,92 @@
+import re
+
+from django.utils import timezone
+
+from .models import Item
+
+FTS_TABLE = 'anammco_item_fts'
+
+
+def search_ddl(item_table):
+    """SQLite statements creating the FTS5 index over ``item_table``.
+
+    The index is an external-content table kept in sync by triggers, so
+    every Item insert/delete (and every change to name or description) is
+    indexed incrementally.  Bids only UPDATE ``current_bid`` and therefore
+    never touch the index.
+    """
+    values = {'fts': FTS_TABLE, 'items': item_table}
+    return [statement % values for statement in (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS %(fts)s USING fts5("
+        "name, description, content='%(items)s', content_rowid='id', "
+        "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS %(fts)s_ai AFTER INSERT ON %(items)s BEGIN "
+        "INSERT INTO %(fts)s(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS %(fts)s_ad AFTER DELETE ON %(items)s BEGIN "
+        "INSERT INTO %(fts)s(%(fts)s, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS %(fts)s_au AFTER UPDATE OF name, description ON %(items)s BEGIN "
+        "INSERT INTO %(fts)s(%(fts)s, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO %(fts)s(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    )]
+
+
+def create_search_index(cursor, item_table):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = '%s'" % FTS_TABLE)
+    exists = cursor.fetchone() is not None
+    for statement in search_ddl(item_table):
+        cursor.execute(statement)
+    if not exists:
+        cursor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (FTS_TABLE, FTS_TABLE))
+
+
+def match_expression(text):
+    """Turn user input into an FTS5 query; the last word matches as a prefix.
+
+    Every term is quoted, so operators typed by the user are searched for
+    literally instead of being interpreted.
+    """
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return None
+    return ' '.join(['"%s"' % term for term in terms[:-1]] + ['"%s"*' % terms[-1]])
+
+
+def encode_cursor(item):
+    return '%r:%d' % (item.score, item.pk)
+
+
+def decode_cursor(token):
+    try:
+        score, pk = token.rsplit(':', 1)
+        return float(score), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def search_items(text, size, after=None):
+    """Return ``(items, next_cursor)`` for live lots matching ``text``.
+
+    Results are ordered by bm25 rank, then id, and paged by keyset on that
+    pair.  Each item carries its rank as ``score``; ``current_bid`` is
+    deferred so callers can read it from the bid cache.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return [], None
+    sql = (
+        'SELECT i.id, i.name, i.description, i.auction_end_time, f.rank AS score '
+        'FROM %(fts)s f JOIN %(items)s i ON i.id = f.rowid '
+        'WHERE %(fts)s MATCH %%s AND i.auction_end_time >= %%s'
+    ) % {'fts': FTS_TABLE, 'items': Item._meta.db_table}
+    params = [expression, timezone.now()]
+    cursor = decode_cursor(after) if after else None
+    if cursor is not None:
+        sql += ' AND (f.rank > %s OR (f.rank = %s AND i.id > %s))'
+        params += [cursor[0], cursor[0], cursor[1]]
+    sql += ' ORDER BY f.rank, i.id LIMIT %s'
+    params.append(size + 1)
+    rows = list(Item.objects.raw(sql, params))
+    items = rows[:size]
+    return items, encode_cursor(items[-1]) if len(rows) > size else None
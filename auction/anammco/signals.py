@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .auth import user_cache
+from .bid_cache import bid_cache
+from .fragments import bump_lot_version, bump_lot_versions
+from .models import Item
+
+# Sent with ``item_ids`` after a set-based change to many lots (imports,
+# admin bulk actions), which skips post_save.
+lots_changed = Signal()
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_item(sender, instance, **kwargs):
+    # Admin edits go through save()/delete(); bids only ever UPDATE.
+    bid_cache.invalidate(instance.pk)
+    bump_lot_version(instance.pk)
+
+
+@receiver(lots_changed)
+def invalidate_items(sender, item_ids, **kwargs):
+    bid_cache.invalidate_many(item_ids)
+    bump_lot_versions(item_ids)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def evict_user(sender, instance, **kwargs):
+    # Covers password changes and deactivation, in every worker.
+    user_cache.evict(instance.pk)
+
+
+@receiver(user_logged_out)
+def evict_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        user_cache.evict(user.pk)
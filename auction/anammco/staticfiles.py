@@ -0,0 +1,210 @@
+"""
+Static files built once and served without per-request work.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` writes
+content-hashed copies plus ``.gz`` (and ``.br`` with the ``brotli``
+package) next to each compressible file.  ``StaticFilesApp`` (WSGI) and
+``ASGIStaticFilesApp`` serve STATIC_ROOT in front of the Django app,
+picking the best encoding the client accepts and caching hashed names for
+a year.  ``MediaFilesApp`` and ``ASGIMediaFilesApp`` do the same for
+uploads and the lot photo derivatives written into MEDIA_ROOT.
+"""
+import asyncio
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.html', '.ttf', '.otf', '.eot')
+
+# ManifestStaticFilesStorage names copies <name>.<12 hex digits>.<ext>.
+HASHED = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+# Lot photos and derivatives are named <sha256>[-<label>].<ext>.
+DIGEST = re.compile(r'^[0-9a-f]{64}[-.]')
+
+FOREVER = 'public, max-age=31536000, immutable'
+BRIEFLY = 'public, max-age=300'
+
+
+def compress_file(path):
+    """Write ``path.gz`` (and ``path.br``) where they come out smaller."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as out:
+                out.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed file names, plus gzip/brotli variants written at build time."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        written = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if isinstance(processed, Exception):
+                continue
+            written.update(n for n in (name, hashed_name) if n and n.endswith(COMPRESSIBLE))
+        if dry_run:
+            return
+        # After every pass, so each file is compressed in its final form.
+        for name in sorted(written):
+            if self.exists(name):
+                compress_file(self.path(name))
+
+
+class StaticFilesApp:
+    """WSGI middleware serving STATIC_ROOT from an index built at startup.
+
+    Restart after ``collectstatic``; files not in the index go to the
+    wrapped application (which serves them itself under ``DEBUG``).
+    """
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        prefix = prefix or settings.STATIC_URL
+        self.prefix = None if '//' in prefix else '/' + prefix.strip('/') + '/'
+        self.files = self.index() if self.root and self.prefix else {}
+
+    def index(self):
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for filename in names:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if name.endswith(('.gz', '.br')) and os.path.exists(path[:-3]):
+                    continue
+                files[self.prefix + name] = self.entry(path, FOREVER if HASHED.search(filename) else BRIEFLY)
+        return files
+
+    def entry(self, path, cache_control):
+        variants = {'': (path, os.path.getsize(path))}
+        for encoding, suffix in self.encodings:
+            if os.path.exists(path + suffix):
+                variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        return variants, content_type, cache_control, '"%x-%x"' % (int(os.path.getmtime(path)), variants[''][1])
+
+    def lookup(self, path):
+        return self.files.get(path)
+
+    def respond(self, path, method, if_none_match, accept_encoding):
+        """Return ``(status, headers, file path or None)``, or None to pass the request on."""
+        entry = self.lookup(path)
+        if entry is None or method not in ('GET', 'HEAD'):
+            return None
+        variants, content_type, cache_control, etag = entry
+        headers = [('Content-Type', content_type), ('Cache-Control', cache_control), ('ETag', etag)]
+        if len(variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if if_none_match == etag:
+            return 304, headers, None
+        encoding = next((encoding for encoding, _ in self.encodings
+                         if encoding in variants and encoding in accept_encoding), '')
+        path, size = variants[encoding]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(size)))
+        return 200, headers, None if method == 'HEAD' else path
+
+    def __call__(self, environ, start_response):
+        response = self.respond(
+            environ.get('PATH_INFO', ''), environ['REQUEST_METHOD'],
+            environ.get('HTTP_IF_NONE_MATCH'), environ.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        if response is None:
+            return self.application(environ, start_response)
+        status, headers, path = response
+        start_response('200 OK' if status == 200 else '304 Not Modified', headers)
+        if path is None:
+            return []
+        wrapper = environ.get('wsgi.file_wrapper')
+        source = open(path, 'rb')
+        return wrapper(source, 65536) if wrapper else _chunks(source)
+
+
+class ASGIStaticFilesApp(StaticFilesApp):
+    """``StaticFilesApp`` for ASGI servers; file reads run off the event loop."""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.application(scope, receive, send)
+        headers = dict(scope.get('headers', ()))
+        response = self.respond(
+            scope.get('path', ''), scope['method'],
+            headers.get(b'if-none-match', b'').decode('latin-1') or None,
+            headers.get(b'accept-encoding', b'').decode('latin-1'),
+        )
+        if response is None:
+            return await self.application(scope, receive, send)
+        status, headers, path = response
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        if path is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        with open(path, 'rb') as source:
+            while True:
+                chunk = await asyncio.to_thread(source.read, 65536)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': bool(chunk)})
+                if not chunk:
+                    break
+
+
+class MediaFilesApp(StaticFilesApp):
+    """``StaticFilesApp`` for MEDIA_ROOT, where files appear while running.
+
+    Nothing is indexed: each request looks its file up on disk.  Lot
+    photos and their derivatives are named after the SHA-256 of the
+    upload, so those are cached for a year like fingerprinted assets.
+    """
+
+    encodings = ()
+
+    def __init__(self, application, root=None, prefix=None):
+        super().__init__(application, root or settings.MEDIA_ROOT, prefix or settings.MEDIA_URL)
+
+    def index(self):
+        return {}
+
+    def lookup(self, path):
+        if not (self.root and self.prefix and path.startswith(self.prefix)) or path.endswith('.part'):
+            return None
+        try:
+            path = safe_join(self.root, path[len(self.prefix):])
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        return self.entry(path, FOREVER if DIGEST.search(os.path.basename(path)) else BRIEFLY)
+
+
+class ASGIMediaFilesApp(MediaFilesApp, ASGIStaticFilesApp):
+    """``MediaFilesApp`` for ASGI servers."""
+
+
+def _chunks(source):
+    with source:
+        yield from iter(lambda: source.read(65536), b'')
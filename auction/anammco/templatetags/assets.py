@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def asset_url(path, cdn):
+    """The self-hosted copy of ``path`` if it was vendored, else ``cdn``."""
+    if not (staticfiles_storage.exists(path) or finders.find(path)):
+        return cdn
+    try:
+        return staticfiles_storage.url(path)
+    except ValueError:  # Not in the manifest yet: run collectstatic.
+        return cdn
+
+
+@register.simple_tag
+def asset(path, cdn):
+    """``{% asset 'anammco/vendor/w3.css' 'https://...' %}``
+
+    ``vendor_assets`` downloads every URL named this way in the templates.
+    """
+    return asset_url(path, cdn)
+
+
+@register.simple_tag
+def lot_image(image, alt='', sizes='(max-width: 600px) 100vw, 33vw'):
+    """A lazy-loaded, responsive ``<img>`` for a ``LotImage`` (nothing for None)."""
+    if image is None:
+        return ''
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="lazy" '
+        'decoding="async" style="width:100%;height:auto" class="w3-hover-opacity">',
+        image.src(), image.srcset, sizes, image.width, image.height, alt,
+    )
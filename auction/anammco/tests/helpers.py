@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.utils import timezone
+
+from anammco.bid_cache import bid_cache
+from anammco.models import Item
+
+
+def reset_caches():
+    """Forget cached prices and lot versions: test databases reuse item ids."""
+    bid_cache.clear()
+    if bid_cache.backend is not None:
+        bid_cache.backend.clear()
+    caches['shared'].clear()
+    caches['template_fragments'].clear()
+
+
+def make_item(current_bid=0, ends_in=timedelta(hours=1), **fields):
+    fields.setdefault('name', 'Lot')
+    fields.setdefault('description', '')
+    return Item.objects.create(
+        current_bid=current_bid, auction_end_time=timezone.now() + ends_in, **fields,
+    )
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from anammco.admin import ItemAdmin
+from anammco.closing import unsettled
+from anammco.models import Bid, Item
+
+from .helpers import make_item, reset_caches
+
+# The admin's own CSS and JS aren't collected during tests.
+plain_static = override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+@plain_static
+class ItemAdminActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser('admin', password='secret')
+
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(self.admin)
+
+    def act(self, action, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:anammco_item_changelist'), {
+                'action': action, ACTION_CHECKBOX_NAME: [item.pk for item in items],
+            }, follow=True)
+        return [(message.level_tag, str(message)) for message in response.context['messages']]
+
+    def test_close_now_ends_and_settles_the_selected_open_lots(self):
+        chosen, other = make_item(), make_item()
+        ended = make_item(ends_in=-timedelta(hours=1))
+        messages = self.act('close_now', [chosen, ended])
+        self.assertEqual(messages[0][0], 'success')
+        self.assertRegex(messages[0][1], r'^Closed 1 lots in ')
+        self.assertLessEqual(Item.objects.get(pk=chosen.pk).auction_end_time, timezone.now())
+        self.assertGreater(Item.objects.get(pk=other.pk).auction_end_time, timezone.now())
+        self.assertNotIn(chosen.pk, unsettled().values_list('pk', flat=True))
+
+    def test_extend_moves_open_lots_only(self):
+        lot = make_item()
+        ended = make_item(ends_in=-timedelta(hours=1))
+        self.act('extend_day', [lot, ended])
+        self.assertEqual(Item.objects.get(pk=lot.pk).auction_end_time, lot.auction_end_time + timedelta(days=1))
+        self.assertEqual(Item.objects.get(pk=ended.pk).auction_end_time, ended.auction_end_time)
+
+    @override_settings(ANAMMCO_RELIST_HOURS=48)
+    def test_relist_reopens_unsold_lots_only(self):
+        unsold = make_item(ends_in=-timedelta(hours=1))
+        sold = make_item(ends_in=-timedelta(hours=1))
+        Bid.objects.create(bidder=self.admin, item=sold, bid_amount=5)
+        messages = self.act('relist', [unsold, sold])
+        self.assertRegex(messages[0][1], r'^Relisted 1 lots in ')
+        reopened = Item.objects.get(pk=unsold.pk).auction_end_time
+        self.assertAlmostEqual(reopened, timezone.now() + timedelta(hours=48), delta=timedelta(minutes=1))
+        self.assertEqual(Item.objects.get(pk=sold.pk).auction_end_time, sold.auction_end_time)
+
+    def test_nothing_to_do_is_a_warning(self):
+        ended = make_item(ends_in=-timedelta(hours=1))
+        (level, text), = self.act('extend_hour', [ended])
+        self.assertEqual(level, 'warning')
+        self.assertRegex(text, r'^Extended 0 lots in ')
+
+
+@plain_static
+class KeysetChangeListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser('admin', password='secret')
+        cls.items = [make_item(name='Lot %d' % n) for n in range(5)]
+
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(self.admin)
+
+    def page(self, **params):
+        with mock.patch.object(ItemAdmin, 'list_per_page', 2):
+            response = self.client.get(reverse('admin:anammco_item_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_pages_follow_the_cursor(self):
+        seen = []
+        cl = self.page()
+        self.assertTrue(cl.keyset)
+        while True:
+            seen.extend(item.pk for item in cl.result_list)
+            if cl.next_cursor is None:
+                break
+            cl = self.page(cursor=cl.next_cursor)
+        self.assertEqual(seen, sorted((item.pk for item in self.items), reverse=True))
+
+    def test_sorting_falls_back_to_numbered_pages(self):
+        self.assertFalse(self.page(o='2').keyset)
+
+    def test_a_bad_cursor_is_rejected(self):
+        with mock.patch.object(ItemAdmin, 'list_per_page', 2):
+            response = self.client.get(reverse('admin:anammco_item_changelist'), {'cursor': 'x'})
+        # The admin redirects invalid lookups to ?e=1.
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('e=1', response['Location'])
+
+    def test_search_by_id(self):
+        cl = self.page(q=str(self.items[3].pk))
+        self.assertEqual([item.pk for item in cl.result_list], [self.items[3].pk])
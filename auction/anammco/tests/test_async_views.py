@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from anammco.async_views import in_db_pool, pooled
+
+
+class DbPoolTests(SimpleTestCase):
+    def run_in_pool(self, func):
+        events = []
+
+        def close():
+            events.append(('close', threading.current_thread().name))
+
+        def work():
+            events.append(('work', threading.current_thread().name))
+            return func()
+
+        with mock.patch('anammco.async_views.close_old_connections', side_effect=close):
+            try:
+                return asyncio.run(in_db_pool(work)()), events
+            except Exception as exc:
+                return exc, events
+
+    def test_connections_are_recycled_around_each_call(self):
+        result, events = self.run_in_pool(lambda: 'done')
+        self.assertEqual(result, 'done')
+        self.assertEqual([event for event, _ in events], ['close', 'work', 'close'])
+        threads = {thread for _, thread in events}
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads.pop().startswith('anammco-db'))
+
+    def test_connections_are_recycled_after_a_failure_too(self):
+        def fail():
+            raise ValueError('boom')
+
+        result, events = self.run_in_pool(fail)
+        self.assertIsInstance(result, ValueError)
+        self.assertEqual([event for event, _ in events], ['close', 'work', 'close'])
+
+
+class PooledViewTests(SimpleTestCase):
+    def test_sync_views_run_side_by_side(self):
+        # Both requests must be inside the view at once to get past the
+        # barrier; on Django's single sync thread the first would time out.
+        barrier = threading.Barrier(2, timeout=5)
+
+        @pooled
+        def view(request):
+            barrier.wait()
+            return HttpResponse(threading.current_thread().name)
+
+        async def both():
+            factory = RequestFactory()
+            return await asyncio.gather(view(factory.get('/')), view(factory.get('/')))
+
+        with mock.patch('anammco.async_views.close_old_connections'):
+            responses = asyncio.run(both())
+        self.assertEqual(len({response.content for response in responses}), 2)
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from anammco.auth import CachedModelBackend, UserCache, user_cache
+
+from .helpers import reset_caches
+
+
+class UserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('bidder', password='secret')
+
+    def setUp(self):
+        reset_caches()
+        user_cache.clear()
+
+    def test_callers_get_copies_that_share_no_cached_state(self):
+        cache = UserCache()
+        cache.set(self.user.pk, self.user)
+        first = cache.get(self.user.pk)
+        first._state.fields_cache['marker'] = object()
+        first.note = 'request one'
+        second = cache.get(self.user.pk)
+        self.assertNotIn('marker', second._state.fields_cache)
+        self.assertFalse(hasattr(second, 'note'))
+
+    def test_eviction_in_one_worker_reaches_the_others(self):
+        caches['shared'].clear()
+        here, there = UserCache(versions='shared'), UserCache(versions='shared')
+        here.set(self.user.pk, self.user, here.version(self.user.pk))
+        self.assertIsNotNone(here.get(self.user.pk, here.version(self.user.pk)))
+        there.evict(self.user.pk)
+        self.assertIsNone(here.get(self.user.pk, here.version(self.user.pk)))
+
+    def test_password_change_is_seen_by_the_backend(self):
+        backend = CachedModelBackend()
+        cached = backend.get_user(self.user.pk)
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.set_password('changed')
+        user.save()
+        self.assertNotEqual(backend.get_user(self.user.pk).password, cached.password)
+
+    def test_sessions_logged_in_through_model_backend_stay_valid(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('auction_list')).status_code, 200)
+
+    def test_logout_ends_the_session(self):
+        self.client.force_login(self.user)
+        session_key = self.client.session.session_key
+        self.client.logout()
+        self.assertFalse(caches['shared'].has_key('django.contrib.sessions.cached_db' + session_key))
+        self.assertEqual(self.client.get(reverse('auction_list')).status_code, 302)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from anammco.bid_cache import BidCache
+from anammco.fragments import lot_versions
+
+from .helpers import make_item, reset_caches
+
+
+class BidCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_price_only_moves_up(self):
+        cache = BidCache()
+        cache.set(1, Decimal('20'))
+        cache.set(1, Decimal('10'))
+        self.assertEqual(cache.get(1), Decimal('20'))
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = BidCache(max_entries=2)
+        cache.set(1, Decimal('1'))
+        cache.set(2, Decimal('2'))
+        cache.get(1)
+        cache.set(3, Decimal('3'))
+        self.assertEqual(cache.get_many([1, 2, 3]), {1: Decimal('1'), 3: Decimal('3')})
+
+    def test_workers_share_prices_through_the_backend(self):
+        here, there = BidCache(backend='shared'), BidCache(backend='shared')
+        there.set(1, Decimal('30'))
+        self.assertEqual(here.get(1), Decimal('30'))
+
+    def test_local_copy_expires_after_local_ttl(self):
+        here, there = BidCache(backend='shared', local_ttl=1), BidCache(backend='shared')
+        here.set(1, Decimal('10'))
+        there.set(1, Decimal('40'))
+        self.assertEqual(here.get(1), Decimal('10'))
+        with mock.patch('anammco.bid_cache.time.monotonic', return_value=10 ** 9):
+            self.assertEqual(here.get(1), Decimal('40'))
+
+    def test_lagging_worker_does_not_lower_the_shared_price(self):
+        here, there = BidCache(backend='shared'), BidCache(backend='shared')
+        there.set(1, Decimal('50'))
+        here.set(1, Decimal('45'))
+        self.assertEqual(BidCache(backend='shared').get(1), Decimal('50'))
+
+    def test_invalidate_reaches_the_backend(self):
+        here, there = BidCache(backend='shared'), BidCache(backend='shared')
+        here.set(1, Decimal('10'))
+        there.invalidate_many([1])
+        here.clear()
+        self.assertIsNone(here.get(1))
+
+
+class PricesForTests(TestCase):
+    def setUp(self):
+        reset_caches()
+
+    def test_misses_are_loaded_in_one_query_then_served_from_cache(self):
+        lots = [make_item(current_bid=n) for n in (5, 6)]
+        ids = [lot.pk for lot in lots]
+        cache = BidCache(backend='shared')
+        with self.assertNumQueries(1):
+            self.assertEqual(cache.prices_for(ids), {ids[0]: Decimal('5'), ids[1]: Decimal('6')})
+        with self.assertNumQueries(0):
+            cache.prices_for(ids)
+
+
+@override_settings(ANAMMCO_LOT_VERSION_TTL=60)
+class SharedVersionExpiryTests(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_lot_versions_are_stored_with_a_timeout(self):
+        with mock.patch.object(caches['shared'], 'add', wraps=caches['shared'].add) as add:
+            lot_versions([1])
+        self.assertEqual(add.call_args.args[2], 60)
@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from anammco.bid_cache import bid_cache
+from anammco.bidding import MAX_AMOUNT, accept_bid, parse_amount, place
+from anammco.models import Bid, Item
+
+from .helpers import make_item, reset_caches
+
+
+class ParseAmountTests(SimpleTestCase):
+    def test_quantizes_to_cents(self):
+        self.assertEqual(parse_amount('12.345'), Decimal('12.34'))
+        self.assertEqual(parse_amount(' 7 '), Decimal('7.00'))
+
+    def test_refuses_what_is_not_a_positive_amount(self):
+        for raw in (None, '', 'abc', '-1', '0', '0.004', 'NaN', 'sNaN', 'Infinity'):
+            with self.subTest(raw=raw):
+                self.assertIsNone(parse_amount(raw))
+
+    def test_refuses_amounts_the_columns_cannot_hold(self):
+        self.assertEqual(parse_amount(str(MAX_AMOUNT)), MAX_AMOUNT)
+        for raw in (str(MAX_AMOUNT + Decimal('0.01')), '1e30', '123456789012345678901234567890'):
+            with self.subTest(raw=raw):
+                self.assertIsNone(parse_amount(raw))
+
+
+@override_settings(ANAMMCO_SOFT_CLOSE={'WINDOW': 60, 'EXTEND_TO': 120})
+class AcceptBidTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('bidder', password='secret')
+
+    def setUp(self):
+        reset_caches()
+
+    def test_only_a_higher_bid_is_accepted(self):
+        item = make_item(current_bid=100)
+        self.assertFalse(accept_bid(self.user, item.pk, Decimal('100')))
+        self.assertTrue(accept_bid(self.user, item.pk, Decimal('101')))
+        item.refresh_from_db()
+        self.assertEqual(item.current_bid, Decimal('101'))
+        self.assertEqual(list(Bid.objects.values_list('bid_amount', flat=True)), [Decimal('101')])
+
+    def test_closed_lots_take_no_bids(self):
+        item = make_item(current_bid=1, ends_in=-timedelta(seconds=1))
+        self.assertFalse(accept_bid(self.user, item.pk, Decimal('50')))
+        self.assertFalse(Bid.objects.exists())
+
+    def test_late_bid_extends_the_deadline_once(self):
+        item = make_item(current_bid=1, ends_in=timedelta(seconds=30))
+        outcome = accept_bid(self.user, item.pk, Decimal('2'))
+        item.refresh_from_db()
+        self.assertEqual(item.auction_end_time, outcome.extended_to)
+        # The next late bid falls outside the window of the new deadline.
+        self.assertIsNone(accept_bid(self.user, item.pk, Decimal('3')).extended_to)
+
+    def test_early_bid_leaves_the_deadline_alone(self):
+        item = make_item(current_bid=1)
+        self.assertIsNone(accept_bid(self.user, item.pk, Decimal('2')).extended_to)
+
+
+class PlaceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('bidder', password='secret')
+
+    def setUp(self):
+        reset_caches()
+
+    def test_accepted_bid_is_written_through_and_published(self):
+        item = make_item(current_bid=10)
+        with mock.patch('anammco.bidding.broker') as broker:
+            self.assertTrue(place(self.user, item.pk, Decimal('20')))
+        self.assertEqual(bid_cache.get(item.pk), Decimal('20'))
+        broker.publish.assert_called_once_with(item.pk, current_bid=Decimal('20'))
+
+    def test_bid_at_or_below_the_cached_price_needs_no_query(self):
+        item = make_item(current_bid=10)
+        bid_cache.prices_for([item.pk])
+        with self.assertNumQueries(0):
+            self.assertFalse(place(self.user, item.pk, Decimal('10')))
+
+    def test_bid_view_answers_json_to_fetch(self):
+        item = make_item(current_bid=10)
+        self.client.force_login(self.user)
+        url = reverse('place_bid', args=[item.pk])
+        for amount, accepted in (('11', True), ('11', False), ('1e30', False)):
+            response = self.client.post(url, {'bid_amount': amount}, HTTP_ACCEPT='application/json')
+            self.assertEqual(response.json(), {'item': item.pk, 'accepted': accepted})
+
+
+class ConcurrentBidTests(TransactionTestCase):
+    def setUp(self):
+        reset_caches()
+
+    def test_racing_bidders_never_both_win(self):
+        User = get_user_model()
+        users = [User.objects.create_user('racer%d' % n) for n in range(8)]
+        item = make_item(current_bid=0)
+
+        def bid(user):
+            try:
+                return bool(accept_bid(user, item.pk, Decimal('5')))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            results = list(pool.map(bid, users))
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Bid.objects.filter(item=item).count(), 1)
+        self.assertEqual(Item.objects.get(pk=item.pk).current_bid, Decimal('5'))
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from anammco import bulk
+from anammco.closing import unsettled
+from anammco.models import Bid, Item
+from anammco.signals import lots_changed
+
+from .helpers import make_item, reset_caches
+
+
+class BulkActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('bidder', password='secret')
+
+    def setUp(self):
+        reset_caches()
+        self.changed = []
+
+        def record(sender, item_ids, **kwargs):
+            self.changed.append(sorted(item_ids))
+
+        lots_changed.connect(record)
+        self.addCleanup(lots_changed.disconnect, record)
+
+    def test_close_ends_and_settles_open_lots_in_batches(self):
+        open_lots = [make_item() for _ in range(5)]
+        ended = make_item(ends_in=-timedelta(hours=1))
+        Bid.objects.create(bidder=self.user, item=open_lots[0], bid_amount=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            done = bulk.close(Item.objects.all(), batch_size=2)
+        self.assertEqual(done, 5)
+        self.assertFalse(Item.objects.filter(auction_end_time__gt=timezone.now()).exists())
+        self.assertEqual(list(unsettled().values_list('pk', flat=True)), [ended.pk])
+        self.assertEqual(self.changed, [[lot.pk for lot in open_lots[:2]], [lot.pk for lot in open_lots[2:4]],
+                                        [open_lots[4].pk]])
+
+    def test_extend_moves_only_open_lots(self):
+        lot = make_item()
+        ended = make_item(ends_in=-timedelta(hours=1))
+        before = {item.pk: item.auction_end_time for item in Item.objects.all()}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(bulk.extend(Item.objects.all(), timedelta(days=1)), 1)
+        self.assertEqual(Item.objects.get(pk=lot.pk).auction_end_time, before[lot.pk] + timedelta(days=1))
+        self.assertEqual(Item.objects.get(pk=ended.pk).auction_end_time, before[ended.pk])
+        self.assertEqual(self.changed, [[lot.pk]])
+
+    def test_relist_reopens_closed_lots_without_bids(self):
+        unsold, sold = make_item(), make_item()
+        Bid.objects.create(bidder=self.user, item=sold, bid_amount=10)
+        bulk.close(Item.objects.all())
+        self.assertFalse(unsettled().exists())
+        end_time = timezone.now() + timedelta(days=7)
+        self.assertEqual(bulk.relist(Item.objects.all(), end_time), 1)
+        self.assertEqual(Item.objects.get(pk=unsold.pk).auction_end_time, end_time)
+        self.assertEqual(list(unsettled().values_list('pk', flat=True)), [unsold.pk])
+
+    def test_writes_go_to_the_write_database(self):
+        # The admin's queryset may come from a replica; the alias it names
+        # must not be used.
+        lot = make_item()
+        self.assertEqual(bulk.extend(Item.objects.using('replica-that-lags'), timedelta(hours=1)), 1)
+        self.assertGreater(Item.objects.get(pk=lot.pk).auction_end_time, lot.auction_end_time)
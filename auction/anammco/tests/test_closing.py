@@ -0,0 +1,87 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from anammco.bidding import accept_bid
+from anammco.closing import SETTLEMENT_TABLE, AuctionCloser, unsettled
+from anammco.models import Bid, Item
+
+from .helpers import make_item
+
+
+def settlements():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT item_id, bid_id FROM %s' % SETTLEMENT_TABLE)
+        return dict(cursor.fetchall())
+
+
+@override_settings(ANAMMCO_SOFT_CLOSE={'WINDOW': 60, 'EXTEND_TO': 120})
+class AuctionCloserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.alice = User.objects.create_user('alice', password='secret')
+        cls.bob = User.objects.create_user('bob', password='secret')
+
+    def expire(self, item):
+        Item.objects.filter(pk=item.pk).update(auction_end_time=timezone.now() - timedelta(seconds=1))
+
+    def test_settles_due_lots_with_their_highest_bid(self):
+        sold = make_item(ends_in=timedelta(seconds=30))
+        unsold = make_item(ends_in=timedelta(seconds=30))
+        running = make_item(ends_in=timedelta(hours=1))
+        accept_bid(self.alice, sold.pk, Decimal('10'))
+        accept_bid(self.bob, sold.pk, Decimal('20'))
+        closer = AuctionCloser()
+        self.assertEqual(closer.load(), 3)
+        self.expire(sold)
+        self.expire(unsold)
+        settled, lag = closer.close_due(timezone.now() + timedelta(minutes=3))
+        self.assertEqual(settled, 2)
+        winner = Bid.objects.get(item=sold, bid_amount=Decimal('20'))
+        self.assertEqual(settlements(), {sold.pk: winner.pk, unsold.pk: None})
+        self.assertEqual(list(unsettled().values_list('pk', flat=True)), [running.pk])
+
+    def test_extended_lot_is_rescheduled_not_settled(self):
+        item = make_item(ends_in=timedelta(seconds=30))
+        closer = AuctionCloser()
+        closer.load()
+        accept_bid(self.alice, item.pk, Decimal('10'))
+        self.assertEqual(closer.close_due(timezone.now() + timedelta(seconds=31))[0], 0)
+        self.assertEqual(settlements(), {})
+        item.refresh_from_db()
+        self.assertEqual(closer.next_deadline(), item.auction_end_time)
+
+    def test_bid_after_settlement_is_refused(self):
+        item = make_item(ends_in=timedelta(seconds=30))
+        closer = AuctionCloser()
+        closer.load()
+        self.expire(item)
+        closer.close_due(timezone.now() + timedelta(seconds=31))
+        self.assertEqual(settlements(), {item.pk: None})
+        # Even with an end time that looks open (a clock read before the
+        # closer took the lock), a settled lot takes no bids and keeps its end.
+        end = timezone.now() + timedelta(seconds=10)
+        Item.objects.filter(pk=item.pk).update(auction_end_time=end)
+        self.assertFalse(accept_bid(self.alice, item.pk, Decimal('10')))
+        item.refresh_from_db()
+        self.assertEqual(item.auction_end_time, end)
+        self.assertFalse(Bid.objects.filter(item=item).exists())
+
+    def test_bid_reads_the_time_inside_its_transaction(self):
+        item = make_item(ends_in=timedelta(hours=1))
+        seen = []
+
+        def now():
+            seen.append(connection.in_atomic_block)
+            return timezone.datetime.now(timezone.utc)
+
+        with mock.patch('anammco.bidding.timezone.now', side_effect=now):
+            accept_bid(self.alice, item.pk, Decimal('10'))
+        self.assertTrue(seen)
+        self.assertTrue(all(seen))
@@ -0,0 +1,68 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from anammco.bidding import place
+
+from .helpers import make_item, reset_caches
+
+
+@override_settings(ANAMMCO_PAGE_SIZE=5)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('bidder', password='secret')
+        cls.other = User.objects.create_user('other', password='secret')
+        cls.lots = [make_item(current_bid=1, ends_in=timedelta(hours=1, minutes=n)) for n in range(8)]
+
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(self.user)
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        return first['ETag'], self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def test_unchanged_list_answers_304_after_one_page_query(self):
+        url = reverse('auction_list')
+        etag = self.client.get(url)['ETag']
+        # Session and user come from their caches; the page query is all
+        # that runs: no prices, photos or render.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_bid_on_a_visible_lot_changes_the_list_etag(self):
+        url = reverse('auction_list')
+        etag, _ = self.revalidate(url)
+        place(self.other, self.lots[0].pk, Decimal('5'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bid_on_another_page_keeps_the_list_etag(self):
+        url = reverse('auction_list')
+        etag, _ = self.revalidate(url)
+        place(self.other, self.lots[-1].pk, Decimal('5'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_is_per_user(self):
+        url = reverse('auction_list')
+        etag, _ = self.revalidate(url)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_item_detail_revalidates_until_bid_on(self):
+        url = reverse('item_detail', args=[self.lots[0].pk])
+        etag, response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        place(self.other, self.lots[0].pk, Decimal('5'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(str(response.json()['current_bid'])), Decimal('5'))
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, connection, connections
+from django.test import SimpleTestCase
+
+from anammco.db import retry_on_busy
+from anammco.db.sqlite3.base import DatabaseWrapper
+
+
+class RetryOnBusyTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('anammco.db.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flaky(self, *errors):
+        calls = []
+
+        @retry_on_busy(attempts=3)
+        def write():
+            calls.append(None)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return 'done'
+        return write, calls
+
+    def test_busy_errors_are_retried_with_backoff(self):
+        write, calls = self.flaky(OperationalError('database is locked'), OperationalError('database is busy'))
+        with mock.patch('anammco.db.random.random', return_value=0.5):
+            self.assertEqual(write(), 'done')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [0.01, 0.02])
+
+    def test_gives_up_after_the_last_attempt(self):
+        write, calls = self.flaky(*[OperationalError('database is locked')] * 3)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self.flaky(OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    def test_inside_a_transaction_the_outermost_caller_retries(self):
+        write, calls = self.flaky(OperationalError('database is locked'))
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            with self.assertRaises(OperationalError):
+                write()
+        self.assertEqual(len(calls), 1)
+
+
+class TunedBackendTests(SimpleTestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.path = os.path.join(scratch.name, 'tuned.sqlite3')
+
+    def wrapper(self, **options):
+        settings_dict = {**connection.settings_dict, 'NAME': self.path, 'OPTIONS': options}
+        wrapper = DatabaseWrapper(settings_dict, alias='tuned')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA %s' % name)
+            return cursor.fetchone()[0]
+
+    def test_new_connections_get_the_pragmas(self):
+        wrapper = self.wrapper(pragmas={'cache_size': -1234})
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -1234)
+
+    def test_immediate_transactions_take_the_write_lock_at_begin(self):
+        wrapper = self.wrapper(transaction_mode='IMMEDIATE')
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        self.addCleanup(wrapper.rollback)
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+            other.execute('BEGIN IMMEDIATE')
+
+    def test_deferred_transactions_wait_for_the_first_write(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        self.addCleanup(wrapper.rollback)
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
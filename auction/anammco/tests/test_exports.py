@@ -0,0 +1,119 @@
+import asyncio
+import csv
+import io
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from anammco.async_views import aiterate, pooled
+from anammco.models import Bid
+from anammco.views import export_bids
+
+from .helpers import make_item, reset_caches
+
+DAY = datetime(2030, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def rows(content):
+    return list(csv.reader(io.StringIO(content.decode())))
+
+
+class ExportTestsMixin:
+    def make_bids(self):
+        self.admin = get_user_model().objects.create_superuser('admin', password='secret')
+        # The last second of the day and the first of the next one.
+        late = make_item(name='Late')
+        late.auction_end_time = DAY + timedelta(days=1, seconds=-1)
+        late.save()
+        next_day = make_item(name='Next day')
+        next_day.auction_end_time = DAY + timedelta(days=1)
+        next_day.save()
+        for amount in range(1, 41):
+            Bid.objects.create(bidder=self.admin, item=late, bid_amount=Decimal(amount))
+        Bid.objects.create(bidder=self.admin, item=next_day, bid_amount=Decimal(1))
+
+
+class ExportBidsTests(ExportTestsMixin, TestCase):
+    def setUp(self):
+        reset_caches()
+        self.make_bids()
+        self.client.force_login(self.admin)
+
+    def test_bids_are_streamed_in_pieces(self):
+        with mock.patch('anammco.exports.PIECE_SIZE', 256):
+            response = self.client.get(reverse('export_bids'))
+            self.assertTrue(response.streaming)
+            pieces = list(response.streaming_content)
+        self.assertGreater(len(pieces), 2)
+        exported = rows(b''.join(pieces))
+        self.assertEqual(exported[0][0], 'id')
+        self.assertEqual(len(exported), 1 + 41)
+        self.assertEqual(response['X-Export-Until'], exported[-1][0])
+
+    def test_day_covers_lots_ending_that_day_only(self):
+        response = self.client.get(reverse('export_bids'), {'day': '2030-01-01'})
+        names = {row[2] for row in rows(b''.join(response.streaming_content))[1:]}
+        self.assertEqual(names, {'Late'})
+
+    def test_gzip_and_resume(self):
+        first = Bid.objects.order_by('id')[9].pk
+        response = self.client.get(reverse('export_bids'), {'after': first, 'format': 'ndjson'},
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = zlib.decompress(b''.join(response.streaming_content), 31)
+        self.assertEqual(len(body.splitlines()), 31)
+
+    def test_bad_parameters(self):
+        for params in ({'format': 'xml'}, {'day': 'tomorrow'}, {'after': 'x'}):
+            self.assertEqual(self.client.get(reverse('export_bids'), params).status_code, 400)
+
+
+class AsyncExportTests(ExportTestsMixin, TransactionTestCase):
+    def setUp(self):
+        reset_caches()
+        self.make_bids()
+
+    def test_pooled_export_streams_without_buffering(self):
+        request = RequestFactory().get('/export/bids/')
+        request.user = self.admin
+
+        async def read():
+            response = await pooled(export_bids)(request)
+            self.assertTrue(response.is_async)
+            return [piece async for piece in response]
+
+        with mock.patch('anammco.exports.PIECE_SIZE', 256):
+            pieces = asyncio.run(read())
+        self.assertGreater(len(pieces), 2)
+        self.assertEqual(len(rows(b''.join(pieces))), 1 + 41)
+
+
+class AiterateTests(SimpleTestCase):
+    def test_pieces_are_pulled_one_at_a_time_on_one_thread(self):
+        pulled = []
+        closed = []
+
+        def pieces():
+            try:
+                for n in range(3):
+                    pulled.append(threading.current_thread().name)
+                    yield n
+            finally:
+                closed.append(True)
+
+        async def read():
+            seen = []
+            async for piece in aiterate(pieces()):
+                seen.append((piece, len(pulled)))
+            return seen
+
+        self.assertEqual(asyncio.run(read()), [(0, 1), (1, 2), (2, 3)])
+        self.assertEqual(len(set(pulled)), 1)
+        self.assertTrue(pulled[0].startswith('anammco-stream'))
+        self.assertEqual(closed, [True])
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from anammco.bidding import place
+from anammco.fragments import bump_lot_version, bump_lot_versions, lot_versions
+from anammco.models import Item
+
+from .helpers import make_item, reset_caches
+
+
+class LotVersionTests(TestCase):
+    def setUp(self):
+        reset_caches()
+
+    def test_versions_are_stable_until_bumped(self):
+        first = lot_versions([1, 2])
+        self.assertEqual(set(first), {1, 2})
+        self.assertEqual(lot_versions([1, 2]), first)
+        bump_lot_version(1)
+        second = lot_versions([1, 2])
+        self.assertGreater(second[1], first[1])
+        self.assertEqual(second[2], first[2])
+
+    def test_bulk_bump_moves_every_lot(self):
+        first = lot_versions([1, 2, 3])
+        bump_lot_versions([1, 3])
+        second = lot_versions([1, 2, 3])
+        self.assertNotEqual(second[1], first[1])
+        self.assertEqual(second[2], first[2])
+        self.assertNotEqual(second[3], first[3])
+
+
+@override_settings(ANAMMCO_PAGE_SIZE=10)
+class ListFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('bidder', password='secret')
+        cls.lots = [make_item(current_bid=10, ends_in=timedelta(hours=1, minutes=n), name='Lot %d' % n)
+                    for n in range(12)]
+
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(self.user)
+
+    def render(self):
+        return self.client.get(reverse('auction_list')).content.decode()
+
+    def test_renders_the_app_template_with_pagination(self):
+        response = self.client.get(reverse('auction_list'))
+        self.assertTemplateUsed(response, 'anammco/aution_list.html')
+        self.assertTemplateUsed(response, 'anammco/base.html')
+        self.assertContains(response, '?after=')
+        self.assertContains(response, 'data-live-bid')
+
+    def test_fragment_is_reused_until_the_lot_changes(self):
+        lot = self.lots[0]
+        self.assertIn('Lot 0', self.render())
+        # A set-based change that skips post_save leaves the fragment cached.
+        Item.objects.filter(pk=lot.pk).update(name='Renamed')
+        self.assertNotIn('Renamed', self.render())
+        bump_lot_version(lot.pk)
+        self.assertIn('Renamed', self.render())
+
+    def test_accepted_bid_rerenders_only_its_lot(self):
+        first, second = self.lots[:2]
+        self.render()
+        Item.objects.filter(pk=second.pk).update(name='Stale')
+        place(self.user, first.pk, Decimal('50'))
+        page = self.render()
+        self.assertRegex(page, r'<span data-bid="%d">50(\.00)?</span>' % first.pk)
+        self.assertNotIn('Stale', page)
+
+    def test_admin_save_invalidates_the_fragment(self):
+        lot = self.lots[0]
+        self.render()
+        lot.name = 'Edited'
+        lot.save()
+        self.assertIn('Edited', self.render())
@@ -0,0 +1,104 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import TransactionTestCase
+
+from anammco import ingest
+from anammco.ingest import BidQueueFull, GroupCommitWriter
+from anammco.models import Bid, Item
+
+from .helpers import make_item, reset_caches
+
+
+class GroupCommitWriterTests(TransactionTestCase):
+    def setUp(self):
+        reset_caches()
+        self.user = get_user_model().objects.create_user('bidder')
+        self.item = make_item(current_bid=0)
+
+    def writer(self, **options):
+        writer = GroupCommitWriter(**options)
+        self.addCleanup(writer.stop)
+        return writer
+
+    def batches(self, writer):
+        """Record the size of every batch ``writer`` applies."""
+        sizes = []
+        apply = writer._apply
+
+        def recording(batch):
+            sizes.append(len(batch))
+            return apply(batch)
+
+        writer._apply = recording
+        return sizes
+
+    def test_each_bid_gets_its_own_outcome(self):
+        writer = self.writer(max_delay=0.05)
+        futures = [writer.submit(self.user, self.item.pk, Decimal(amount)) for amount in ('5', '3', '7')]
+        self.assertEqual([bool(future.result(5)) for future in futures], [True, False, True])
+        self.assertEqual(Item.objects.get(pk=self.item.pk).current_bid, Decimal('7'))
+        self.assertEqual(Bid.objects.count(), 2)
+
+    def test_bids_arriving_together_share_a_transaction(self):
+        writer = self.writer(batch_size=64, max_delay=0.2)
+        sizes = self.batches(writer)
+        futures = [writer.submit(self.user, self.item.pk, Decimal(n)) for n in range(1, 11)]
+        for future in futures:
+            future.result(5)
+        self.assertLess(len(sizes), 10)
+        self.assertEqual(sum(sizes), 10)
+
+    def test_batches_never_exceed_batch_size(self):
+        writer = self.writer(batch_size=2, max_delay=0.2)
+        sizes = self.batches(writer)
+        futures = [writer.submit(self.user, self.item.pk, Decimal(n)) for n in range(1, 6)]
+        for future in futures:
+            future.result(5)
+        self.assertLessEqual(max(sizes), 2)
+        self.assertEqual(sum(sizes), 5)
+
+    def test_a_failing_bid_leaves_the_rest_of_its_batch(self):
+        writer = self.writer(max_delay=0.2)
+        good = writer.submit(self.user, self.item.pk, Decimal('5'))
+        # Too many digits for the price column.
+        bad = writer.submit(self.user, self.item.pk, Decimal('1e20'))
+        self.assertTrue(good.result(5))
+        with self.assertRaises(Exception):
+            bad.result(5)
+        self.assertEqual(Item.objects.get(pk=self.item.pk).current_bid, Decimal('5'))
+
+    def test_busy_database_retries_the_whole_batch(self):
+        writer = self.writer(max_delay=0.2)
+        calls = []
+        accept_bid = ingest.accept_bid
+
+        def flaky(user, item_id, amount):
+            calls.append(amount)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+            return accept_bid(user, item_id, amount)
+
+        with mock.patch('anammco.ingest.accept_bid', side_effect=flaky):
+            futures = [writer.submit(self.user, self.item.pk, Decimal(n)) for n in ('5', '6')]
+            self.assertEqual([bool(future.result(5)) for future in futures], [True, True])
+        # The first bid was rolled back with its batch and applied again.
+        self.assertEqual(calls, [Decimal('5'), Decimal('6'), Decimal('5'), Decimal('6')])
+        self.assertEqual(Bid.objects.count(), 2)
+
+    def test_stop_commits_what_is_queued(self):
+        writer = GroupCommitWriter(max_delay=1)
+        future = writer.submit(self.user, self.item.pk, Decimal('5'))
+        writer.stop()
+        self.assertTrue(future.done())
+        self.assertTrue(future.result())
+        self.assertIsNone(writer._thread)
+
+    def test_full_queue_refuses_bids(self):
+        writer = GroupCommitWriter(queue_size=1)
+        with mock.patch.object(writer, '_start'):
+            writer.submit(self.user, self.item.pk, Decimal('5'))
+            with self.assertRaises(BidQueueFull):
+                writer.submit(self.user, self.item.pk, Decimal('6'))
@@ -0,0 +1,136 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from anammco.lots import LotImporter, TooManyErrors, read_csv, read_json_array, read_ndjson
+from anammco.models import Item
+
+from .helpers import reset_caches
+
+
+def lot(number, **fields):
+    return {
+        'lot_number': str(number), 'name': 'Lot %s' % number, 'description': '',
+        'current_bid': '10', 'auction_end_time': '2030-01-01T12:00:00+00:00', **fields,
+    }
+
+
+class ReaderTests(SimpleTestCase):
+    def test_csv_positions_are_file_lines(self):
+        stream = io.StringIO('lot_number,name\n1,"two\nlines"\n\n2,plain\n')
+        self.assertEqual([(line, row['lot_number']) for line, row in read_csv(stream)], [(3, '1'), (5, '2')])
+
+    def test_ndjson_positions_skip_blank_lines(self):
+        stream = io.StringIO('{"lot_number": "1"}\n\n{"lot_number": "2"}\n')
+        self.assertEqual([line for line, _ in read_ndjson(stream)], [1, 3])
+
+    def test_json_array_is_read_in_blocks(self):
+        rows = [lot(n) for n in range(50)]
+        positions = [(n, row['lot_number']) for n, row in read_json_array(io.StringIO(json.dumps(rows)), 64)]
+        self.assertEqual(positions, [(n + 1, str(n)) for n in range(50)])
+
+    def test_json_array_must_be_closed(self):
+        with self.assertRaisesMessage(ValueError, 'not closed'):
+            list(read_json_array(io.StringIO('[{"lot_number": "1"}')))
+
+
+class LotImporterTests(TestCase):
+    def setUp(self):
+        reset_caches()
+
+    def test_creates_then_updates_without_touching_bids(self):
+        importer = LotImporter(chunk_size=2)
+        importer.run(enumerate([lot(1), lot(2), lot(3)], 1))
+        self.assertEqual((importer.created, importer.updated), (3, 0))
+        Item.objects.filter(name='Lot 1').update(current_bid=500)
+        again = LotImporter(chunk_size=2)
+        again.run(enumerate([lot(1, name='Renamed', current_bid='1')], 1))
+        self.assertEqual((again.created, again.updated), (0, 1))
+        item = Item.objects.get(name='Renamed')
+        self.assertEqual(item.current_bid, Decimal('500'))
+        self.assertEqual(Item.objects.count(), 3)
+
+    def test_stops_at_the_first_error_past_the_limit(self):
+        consumed = []
+
+        def rows():
+            for n in range(1, 5001):
+                consumed.append(n)
+                yield n, lot(n, current_bid='not a price')
+
+        importer = LotImporter(max_errors=10)
+        with self.assertRaises(TooManyErrors):
+            importer.run(rows())
+        self.assertEqual(len(consumed), 11)
+        self.assertEqual(len(importer.errors), 11)
+        self.assertEqual(importer.errors[0][0], 1)
+        self.assertIn('current_bid', importer.errors[0][1])
+
+    def test_rejects_rows_without_a_lot_number(self):
+        importer = LotImporter()
+        importer.run(enumerate([lot(''), lot(1)], 1))
+        self.assertEqual(importer.created, 1)
+        self.assertEqual([position for position, _ in importer.errors], [1])
+
+    def test_malformed_json_lines_are_rejected_rows(self):
+        stream = io.StringIO('%s\n{"lot_number": \n%s\n' % (json.dumps(lot(1)), json.dumps(lot(2))))
+        importer = LotImporter()
+        importer.run(read_ndjson(stream))
+        self.assertEqual((importer.created, importer.rejected), (2, 1))
+        self.assertEqual(importer.errors[0][0], 2)
+        self.assertIn('Invalid JSON', importer.errors[0][1])
+
+    def test_lots_whose_item_was_deleted_are_created_again(self):
+        LotImporter().run(enumerate([lot(1), lot(2)], 1))
+        Item.objects.filter(name='Lot 1').delete()
+        again = LotImporter()
+        again.run(enumerate([lot(1, name='Back'), lot(2, name='Kept')], 1))
+        self.assertEqual((again.created, again.updated), (1, 1))
+        self.assertEqual(sorted(Item.objects.values_list('name', flat=True)), ['Back', 'Kept'])
+        third = LotImporter()
+        third.run(enumerate([lot(1, name='Back again')], 1))
+        self.assertEqual((third.created, third.updated), (0, 1))
+        self.assertEqual(Item.objects.count(), 2)
+
+
+class ImportLotsCommandTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.path = os.path.join(scratch.name, 'lots.csv')
+
+    def write_csv(self, lines):
+        with open(self.path, 'w', newline='') as out:
+            out.write('lot_number,name,description,current_bid,auction_end_time\n')
+            out.write(''.join(line + '\n' for line in lines))
+
+    def test_reports_invalid_rows_by_line(self):
+        self.write_csv(['1,One,,5,2030-01-01T00:00:00', '2,Two,,oops,2030-01-01T00:00:00'])
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_lots', self.path, stdout=out, stderr=err)
+        self.assertIn('1 created, 0 updated, 1 rejected', out.getvalue())
+        self.assertIn('line 3: current_bid', err.getvalue())
+
+    def test_max_errors_stops_the_import(self):
+        self.write_csv(['%d,Bad,,oops,2030-01-01T00:00:00' % n for n in range(100)])
+        err = io.StringIO()
+        with self.assertRaisesMessage(CommandError, 'More than 3 invalid rows'):
+            call_command('import_lots', self.path, '--max-errors', '3', stdout=io.StringIO(), stderr=err)
+        self.assertEqual(err.getvalue().count('current_bid'), 4)
+
+    def test_malformed_ndjson_counts_against_max_errors(self):
+        path = os.path.join(os.path.dirname(self.path), 'lots.ndjson')
+        with open(path, 'w') as out:
+            out.write('%s\nnot json\n{"lot_number"\n' % json.dumps(lot(1)))
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_lots', path, '--max-errors', '2', stdout=out, stderr=err)
+        self.assertIn('1 created, 0 updated, 2 rejected', out.getvalue())
+        self.assertIn('line 2: Invalid JSON', err.getvalue())
+        with self.assertRaisesMessage(CommandError, 'More than 1 invalid rows'):
+            call_command('import_lots', path, '--max-errors', '1', stdout=io.StringIO(), stderr=io.StringIO())
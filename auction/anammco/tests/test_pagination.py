@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from anammco.models import Item
+from anammco.pagination import decode_cursor, encode_cursor, keyset_page
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        item = Item(pk=42, auction_end_time=timezone.now())
+        self.assertEqual(decode_cursor(encode_cursor(item)), (item.auction_end_time, 42))
+
+    def test_garbage_decodes_to_none(self):
+        for token in ('', 'not-base64!', 'bm90aGluZw', encode_cursor.__name__):
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = timezone.now() + timedelta(hours=1)
+        # Pairs of lots share an end time, so pages must break ties on id.
+        cls.items = [
+            Item.objects.create(name='Lot %d' % n, description='', current_bid=0,
+                                auction_end_time=start + timedelta(minutes=n // 2))
+            for n in range(7)
+        ]
+
+    def walk(self, size):
+        queryset = Item.objects.all()
+        pages = [keyset_page(queryset, size)]
+        while pages[-1].next_cursor:
+            pages.append(keyset_page(queryset, size, after=pages[-1].next_cursor))
+        return pages
+
+    def test_forward_pages_cover_every_lot_once_in_order(self):
+        pages = self.walk(3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([item.pk for page in pages for item in page], [item.pk for item in self.items])
+        self.assertIsNone(pages[0].previous_cursor)
+
+    def test_previous_cursor_leads_back_to_the_same_page(self):
+        pages = self.walk(3)
+        back = keyset_page(Item.objects.all(), 3, before=pages[2].previous_cursor)
+        self.assertEqual([item.pk for item in back], [item.pk for item in pages[1]])
+        first = keyset_page(Item.objects.all(), 3, before=back.previous_cursor)
+        self.assertEqual([item.pk for item in first], [item.pk for item in pages[0]])
+        self.assertIsNone(first.previous_cursor)
+
+    def test_garbage_cursor_starts_from_the_first_page(self):
+        page = keyset_page(Item.objects.all(), 3, after='garbage')
+        self.assertEqual([item.pk for item in page], [item.pk for item in self.items[:3]])
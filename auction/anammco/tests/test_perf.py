@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from anammco.perf import BUCKETS, Histograms, RequestTiming, histograms
+
+from .helpers import make_item, reset_caches
+
+
+class RequestTimingTests(SimpleTestCase):
+    def test_queries_are_split_by_phase(self):
+        timing = RequestTiming()
+        timing.add_query('SELECT * FROM "django_session"', 0.001)
+        timing.add_query('SELECT * FROM "auth_user"', 0.002)
+        timing.add_query('SELECT * FROM "anammco_item"', 0.003)
+        timing.add_query('UPDATE "anammco_item"', 0.004)
+        self.assertEqual(dict(timing.queries), {'session': 1, 'auth': 1, 'db': 2})
+        self.assertAlmostEqual(timing.durations['db'], 0.007)
+
+    def test_header_lists_phases_with_query_counts(self):
+        timing = RequestTiming()
+        timing.add_query('SELECT 1', 0.0015)
+        timing.add('tpl', 0.002)
+        timing.finish()
+        header = timing.header()
+        self.assertIn('db;dur=1.50;desc="1 queries"', header)
+        self.assertIn('tpl;dur=2.00', header)
+        for phase in ('mw', 'view', 'total'):
+            self.assertIn('%s;dur=' % phase, header)
+
+
+class HistogramsTests(SimpleTestCase):
+    def test_durations_land_in_their_buckets(self):
+        recorded = Histograms()
+        for ms in (0.5, 3, 3, 10000):
+            timing = RequestTiming()
+            timing.durations['total'] = ms / 1000
+            recorded.record('view', timing)
+        entry = recorded.snapshot()['views']['view']['phases']['total']
+        self.assertEqual(entry['count'], 4)
+        self.assertEqual(entry['buckets'][0], 1)
+        self.assertEqual(entry['buckets'][BUCKETS.index(5)], 2)
+        self.assertEqual(entry['buckets'][-1], 1)
+
+
+class PerfMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('bidder', password='secret')
+        cls.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+        make_item(current_bid=1)
+
+    def setUp(self):
+        reset_caches()
+        histograms.clear()
+        self.addCleanup(histograms.clear)
+
+    @override_settings(ANAMMCO_PERF_SAMPLE_RATE=1)
+    def test_sampled_requests_report_server_timing_and_histograms(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('auction_list'))
+        phases = {part.split(';')[0] for part in response['Server-Timing'].split(', ')}
+        self.assertTrue({'mw', 'view', 'total', 'db', 'tpl'} <= phases)
+        self.client.force_login(self.staff)
+        stats = self.client.get(reverse('perf_stats')).json()
+        recorded = stats['views']['auction_list']
+        self.assertEqual(recorded['phases']['total']['count'], 1)
+        self.assertGreater(recorded['queries'], 0)
+
+    @override_settings(ANAMMCO_PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_left_alone(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('auction_list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(histograms.snapshot()['views'], {})
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from anammco.bidding import place
+from anammco.models import Bid
+from anammco.proxy import proxy_price, resolve_proxies, set_proxy
+
+from .helpers import make_item, reset_caches
+
+D = Decimal
+
+
+class ProxyPriceTests(SimpleTestCase):
+    def test_lone_proxy_bids_one_increment_over_the_current_bid(self):
+        self.assertEqual(proxy_price(D('100'), None, [(1, D('5000'))], D('10')), D('110'))
+
+    def test_winner_pays_one_increment_over_the_runner_up(self):
+        proxies = [(1, D('5000')), (2, D('300'))]
+        self.assertEqual(proxy_price(D('100'), 2, proxies, D('10')), D('310'))
+
+    def test_never_above_the_proxy_maximum(self):
+        self.assertEqual(proxy_price(D('100'), None, [(1, D('105'))], D('10')), D('105'))
+        self.assertIsNone(proxy_price(D('100'), None, [(1, D('100'))], D('10')))
+
+    def test_leader_without_rival_stays_put(self):
+        self.assertIsNone(proxy_price(D('100'), 1, [(1, D('5000'))], D('10')))
+
+
+@override_settings(ANAMMCO_BID_INCREMENT='10', ANAMMCO_SOFT_CLOSE={'WINDOW': 60, 'EXTEND_TO': 120})
+class ResolveProxiesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.alice = User.objects.create_user('alice', password='secret')
+        cls.bob = User.objects.create_user('bob', password='secret')
+
+    def setUp(self):
+        reset_caches()
+
+    def test_strongest_proxy_wins_at_the_runner_up_maximum(self):
+        item = make_item(current_bid=100)
+        set_proxy(self.alice, item.pk, D('500'))
+        set_proxy(self.bob, item.pk, D('300'))
+        price, extended_to = resolve_proxies(item.pk)
+        self.assertEqual(price, D('310'))
+        self.assertIsNone(extended_to)
+        self.assertEqual(Bid.objects.get(item=item).bidder, self.alice)
+
+    def test_returns_the_soft_close_extension(self):
+        item = make_item(current_bid=100, ends_in=timedelta(seconds=30))
+        set_proxy(self.alice, item.pk, D('500'))
+        price, extended_to = resolve_proxies(item.pk)
+        self.assertEqual(price, D('110'))
+        item.refresh_from_db()
+        self.assertEqual(item.auction_end_time, extended_to)
+
+    def test_nothing_to_do_without_proxies(self):
+        self.assertEqual(resolve_proxies(make_item().pk), (None, None))
+
+    def test_bid_on_a_lot_without_proxies_takes_the_write_lock_once(self):
+        item = make_item(current_bid=100)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(place(self.alice, item.pk, D('150')))
+        # TestCase runs each test in a transaction, so atomic blocks show up
+        # as savepoints: one for accept_bid and none for resolve_proxies.
+        savepoints = [query for query in queries if query['sql'].startswith('SAVEPOINT')]
+        self.assertEqual(len(savepoints), 1)
+
+    def test_proxy_bid_view_publishes_the_extension(self):
+        item = make_item(current_bid=100, ends_in=timedelta(seconds=30))
+        self.client.force_login(self.alice)
+        with mock.patch('anammco.bidding.broker') as broker:
+            response = self.client.post(
+                reverse('set_proxy_bid', args=[item.pk]), {'max_amount': '500'},
+                HTTP_ACCEPT='application/json',
+            )
+        self.assertEqual(response.json()['current_bid'], '110.00')
+        item.refresh_from_db()
+        broker.publish.assert_called_once_with(
+            item.pk, current_bid=D('110'), auction_end_time=item.auction_end_time,
+        )
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from anammco import bidding
+from anammco.models import Item
+from anammco.proxy import PROXY_ATTEMPTS, set_proxy
+from anammco.querybudget import QueryBudgetExceeded, QueryBudgetTestMixin, assert_query_budget
+from anammco.views import BID_QUERY_BUDGET, LIST_QUERY_BUDGET
+
+from .helpers import make_item, reset_caches
+
+
+class AssertQueryBudgetTests(TestCase):
+    def test_transaction_control_is_not_counted(self):
+        with assert_query_budget(1) as log:
+            with transaction.atomic():
+                with transaction.atomic():
+                    Item.objects.count()
+        self.assertEqual(len(log.queries), 1)
+
+    def test_over_budget_raises_with_a_report(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'ran 2 queries, budget 1'):
+            with assert_query_budget(1, 'two counts'):
+                Item.objects.count()
+                Item.objects.count()
+
+
+@override_settings(ANAMMCO_PAGE_SIZE=10, ANAMMCO_BID_INCREMENT='10', ANAMMCO_ENFORCE_QUERY_BUDGETS=True,
+                   ANAMMCO_SOFT_CLOSE={'WINDOW': 60, 'EXTEND_TO': 120})
+class ViewBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user('bidder', password='secret')
+        cls.rivals = [User.objects.create_user('rival%d' % n, password='secret') for n in range(2)]
+        for n in range(25):
+            make_item(current_bid=n, ends_in=timedelta(hours=1, minutes=n), name='Lot %d' % n)
+
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(self.user)
+
+    def test_auction_list_stays_within_budget_whatever_the_page(self):
+        url = reverse('auction_list')
+        with self.assertQueryBudget(LIST_QUERY_BUDGET):
+            first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertQueryBudget(LIST_QUERY_BUDGET):
+            second = self.client.get(url, {'after': first.context['page'].next_cursor})
+        self.assertEqual(len(second.context['items']), 10)
+
+    def test_bid_with_a_proxy_reply_stays_within_budget(self):
+        item = make_item(current_bid=100, ends_in=timedelta(seconds=30))
+        set_proxy(self.rivals[0], item.pk, Decimal('500'))
+        set_proxy(self.rivals[1], item.pk, Decimal('300'))
+        with self.assertQueryBudget(BID_QUERY_BUDGET):
+            response = self.client.post(reverse('place_bid', args=[item.pk]), {'bid_amount': '150'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Item.objects.get(pk=item.pk).current_bid, Decimal('310'))
+
+    def test_bid_whose_proxy_reply_is_outbid_every_time_stays_within_budget(self):
+        item = make_item(current_bid=100, ends_in=timedelta(seconds=30))
+        set_proxy(self.rivals[0], item.pk, Decimal('500'))
+        accept_bid = bidding.accept_bid
+        calls = []
+
+        def outbid_until_last(user, item_id, amount):
+            calls.append(amount)
+            if len(calls) < PROXY_ATTEMPTS:
+                accept_bid(user, item_id, Decimal('0.01'))  # Loses, as if outbid.
+                return bidding.BidOutcome(False)
+            return accept_bid(user, item_id, amount)
+
+        # The retries repeat the proxy's reads, which the budget reports.
+        with mock.patch('anammco.proxy.accept_bid', outbid_until_last), \
+                self.assertLogs('anammco.querybudget', 'WARNING'):
+            with self.assertQueryBudget(BID_QUERY_BUDGET):
+                response = self.client.post(reverse('place_bid', args=[item.pk]), {'bid_amount': '150'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(calls), PROXY_ATTEMPTS)
+        self.assertEqual(Item.objects.get(pk=item.pk).current_bid, Decimal('160'))
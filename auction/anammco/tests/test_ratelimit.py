@@ -0,0 +1,86 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from anammco import ratelimit
+from anammco.models import Item
+from anammco.ratelimit import BidRateLimiter, LocalBuckets
+
+
+class LocalBucketsTests(SimpleTestCase):
+    def test_spends_from_every_bucket_when_all_have_tokens(self):
+        buckets = LocalBuckets()
+        self.assertIsNone(buckets.take([('a', 0, 2), ('b', 0, 2)]))
+        self.assertIsNone(buckets.take([('a', 0, 2), ('b', 0, 2)]))
+        self.assertEqual(buckets.take([('a', 0, 2), ('b', 0, 2)]), 0)
+
+    def test_spends_nothing_when_one_bucket_is_empty(self):
+        buckets = LocalBuckets()
+        self.assertIsNone(buckets.take([('full', 0, 1), ('small', 0, 1)]))
+        self.assertEqual(buckets.take([('other', 0, 1), ('small', 0, 1)]), 1)
+        # 'other' kept its token although the bid was refused.
+        self.assertIsNone(buckets.take([('other', 0, 1)]))
+
+    def test_drops_least_recently_used_keys(self):
+        buckets = LocalBuckets(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            buckets.take([(key, 0, 1)])
+        self.assertIsNone(buckets.take([('a', 0, 1)]))
+
+
+class BidRateLimiterTests(SimpleTestCase):
+    def test_reports_and_counts_the_scope_over_its_limit(self):
+        limiter = BidRateLimiter({'user': (0, 5), 'item': (0, 1), 'global': (0, 100)})
+        self.assertIsNone(limiter.check(1, 10))
+        self.assertEqual(limiter.check(2, 10), 'item')
+        self.assertIsNone(limiter.check(2, 11))
+        self.assertEqual(limiter.stats(), {'item': 1})
+
+    def test_a_rejected_bid_costs_the_user_nothing(self):
+        limiter = BidRateLimiter({'user': (0, 1), 'item': (0, 1)})
+        self.assertIsNone(limiter.check(1, 10))
+        self.assertEqual(limiter.check(2, 10), 'item')
+        self.assertIsNone(limiter.check(2, 11))
+
+    def test_unconfigured_scopes_are_unlimited(self):
+        limiter = BidRateLimiter({})
+        for _ in range(100):
+            self.assertIsNone(limiter.check(1, 10))
+
+
+class RateLimitedViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('bidder', password='secret')
+        cls.item = Item.objects.create(
+            name='Lot', description='', current_bid=0,
+            auction_end_time=timezone.now() + timedelta(hours=1),
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(ratelimit, 'limiter', BidRateLimiter({'item': (0, 2), 'global': (0, 2)}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = reverse('place_bid', args=[self.item.pk])
+
+    def test_anonymous_bids_do_not_drain_shared_buckets(self):
+        for n in range(10):
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = 'made-up-%d' % n
+            self.assertEqual(self.client.post(self.url, {'bid_amount': '1'}).status_code, 302)
+        self.client.cookies.clear()
+        self.client.force_login(self.user)
+        statuses = [self.client.post(self.url, {'bid_amount': str(n)}).status_code for n in (1, 2, 3)]
+        self.assertEqual(statuses, [302, 302, 429])
+
+    def test_over_limit_answers_429_with_retry_after(self):
+        self.client.force_login(self.user)
+        for n in (1, 2):
+            self.client.post(self.url, {'bid_amount': str(n)})
+        response = self.client.post(self.url, {'bid_amount': '3'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
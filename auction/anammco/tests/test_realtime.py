@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from anammco.realtime import Broker
+
+
+class BrokerTests(SimpleTestCase):
+    def test_publish_wakes_subscribers_on_every_event_loop(self):
+        # Under WSGI each waiting request runs its own event loop.
+        broker = Broker()
+        subscribed = threading.Barrier(4)
+        received = []
+
+        async def wait():
+            subscription = broker.subscribe([1])
+            subscribed.wait()
+            try:
+                received.append(await asyncio.wait_for(subscription.next(), 5))
+            finally:
+                broker.unsubscribe(subscription)
+
+        waiters = [threading.Thread(target=asyncio.run, args=(wait(),)) for _ in range(3)]
+        for waiter in waiters:
+            waiter.start()
+        subscribed.wait()
+        broker.publish(1, current_bid='10.00')
+        for waiter in waiters:
+            waiter.join()
+        self.assertEqual(received, [[b'{"item":1,"current_bid":"10.00"}']] * 3)
+        self.assertEqual(broker.subscriber_count(1), 0)
+
+    def test_slow_subscriber_keeps_only_the_latest_event_per_item(self):
+        broker = Broker()
+
+        async def scenario():
+            subscription = broker.subscribe([1, 2])
+            broker.publish(1, current_bid=1)
+            broker.publish(2, current_bid=5)
+            broker.publish(1, current_bid=2)
+            return await subscription.next()
+
+        self.assertEqual(asyncio.run(scenario()), [
+            b'{"item":1,"current_bid":2}', b'{"item":2,"current_bid":5}',
+        ])
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from anammco.bid_cache import BidCache
+from anammco.middleware import PIN_COOKIE, ReplicaPinMiddleware
+from anammco.models import Item
+from anammco.routers import PrimaryReplicaRouter, pinned_to_primary
+
+from .helpers import make_item, reset_caches
+
+
+@override_settings(ANAMMCO_READ_REPLICAS=['replica1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def test_lots_are_read_from_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Item), 'replica1')
+
+    def test_users_and_sessions_are_read_from_the_primary(self):
+        self.assertEqual(self.router.db_for_read(get_user_model()), 'default')
+
+    def test_pinned_requests_read_from_the_primary(self):
+        token = pinned_to_primary.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Item), 'default')
+        finally:
+            pinned_to_primary.reset(token)
+
+    def test_writes_and_migrations_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_write(Item), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'anammco'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'anammco'))
+
+    @override_settings(ANAMMCO_READ_REPLICAS=[])
+    def test_without_replicas_everything_is_read_from_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Item), 'default')
+
+
+@override_settings(ANAMMCO_REPLICA_PIN_SECONDS=5)
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+    factory = RequestFactory()
+
+    def middleware(self):
+        seen = []
+
+        def view(request):
+            seen.append(pinned_to_primary.get())
+            return HttpResponse()
+        return ReplicaPinMiddleware(view), seen
+
+    def test_post_is_pinned_and_pins_the_browser(self):
+        middleware, seen = self.middleware()
+        response = middleware(self.factory.post('/'))
+        self.assertEqual(seen, [True])
+        self.assertGreater(float(response.cookies[PIN_COOKIE].value), time.time())
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+
+    def test_reads_follow_the_cookie(self):
+        middleware, seen = self.middleware()
+        for value in ('%.3f' % (time.time() + 5), '%.3f' % (time.time() - 1), 'garbage'):
+            request = self.factory.get('/')
+            request.COOKIES[PIN_COOKIE] = value
+            response = middleware(request)
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(seen, [True, False, False])
+        self.assertFalse(pinned_to_primary.get())
+
+    def test_async_requests_are_pinned_too(self):
+        seen = []
+
+        async def view(request):
+            seen.append(pinned_to_primary.get())
+            return HttpResponse()
+
+        response = asyncio.run(ReplicaPinMiddleware(view)(self.factory.post('/')))
+        self.assertEqual(seen, [True])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(ANAMMCO_READ_REPLICAS=['replica1'])
+class PriceCacheFillTests(TestCase):
+    def setUp(self):
+        reset_caches()
+
+    def test_missing_prices_are_read_from_the_primary(self):
+        # 'replica1' is not a configured database: reading from it would fail.
+        item = make_item(current_bid=7)
+        self.assertEqual(BidCache().prices_for([item.pk]), {item.pk: 7})
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from anammco.search import match_expression, search_items
+
+from .helpers import make_item, reset_caches
+
+
+class MatchExpressionTests(SimpleTestCase):
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual(match_expression('Innoson tru'), '"innoson" "tru"*')
+
+    def test_operators_are_searched_literally(self):
+        self.assertEqual(match_expression('truck OR NOT "bus"'), '"truck" "or" "not" "bus"*')
+
+    def test_nothing_to_search_for(self):
+        self.assertIsNone(match_expression(' -*"" '))
+
+
+class SearchItemsTests(TestCase):
+    def test_matches_names_and_descriptions_by_prefix(self):
+        tipper = make_item(name='Innoson tipper', description='fleet disposal')
+        make_item(name='Toyota saloon', description='clean')
+        self.assertEqual([item.pk for item in search_items('innoson tip', 10)[0]], [tipper.pk])
+        self.assertEqual([item.pk for item in search_items('fleet', 10)[0]], [tipper.pk])
+
+    def test_ended_lots_are_left_out(self):
+        make_item(name='Ended truck', ends_in=timedelta(hours=-1))
+        live = make_item(name='Live truck')
+        self.assertEqual([item.pk for item in search_items('truck', 10)[0]], [live.pk])
+
+    def test_closer_matches_rank_first(self):
+        loose = make_item(name='Truck', description='with a long list of extras, spares and paperwork')
+        close = make_item(name='Truck', description='truck')
+        items, _ = search_items('truck', 10)
+        self.assertEqual([item.pk for item in items], [close.pk, loose.pk])
+        self.assertLess(items[0].score, items[1].score)
+
+    def test_cursor_walks_every_match_once_in_rank_order(self):
+        lots = {make_item(name='Tanker %d' % n, description='tanker ' * (n % 3)).pk for n in range(11)}
+        seen, scores, after = [], [], None
+        while True:
+            items, after = search_items('tanker', 4, after=after)
+            seen += [item.pk for item in items]
+            scores += [(item.score, item.pk) for item in items]
+            if after is None:
+                break
+        self.assertEqual(len(seen), len(lots))
+        self.assertEqual(set(seen), lots)
+        self.assertEqual(scores, sorted(scores))
+
+    def test_garbage_cursor_starts_from_the_top(self):
+        make_item(name='Bus')
+        self.assertEqual(len(search_items('bus', 10, after='not-a-cursor')[0]), 1)
+
+
+@override_settings(ANAMMCO_PAGE_SIZE=2)
+class SearchViewTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.client.force_login(get_user_model().objects.create_user('bidder', password='secret'))
+
+    def test_pages_link_with_next(self):
+        for n in range(3):
+            make_item(current_bid=n, name='Crane %d' % n)
+        first = self.client.get(reverse('search'), {'q': 'crane'}).json()
+        self.assertEqual(len(first['results']), 2)
+        second = self.client.get(reverse('search'), {'q': 'crane', 'after': first['next']}).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+        names = {row['name'] for row in first['results'] + second['results']}
+        self.assertEqual(names, {'Crane 0', 'Crane 1', 'Crane 2'})
@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.test import SimpleTestCase, override_settings
+
+from anammco import derivatives
+from anammco.images import LotImage
+from anammco.staticfiles import ASGIStaticFilesApp, MediaFilesApp, StaticFilesApp
+
+CSS = b'body { color: red; }\n' * 50
+
+
+class StaticFilesAppTests(SimpleTestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.root = scratch.name
+        for name, data in (('site.0123456789ab.css', CSS), ('site.0123456789ab.css.gz', gzip.compress(CSS))):
+            with open(os.path.join(self.root, name), 'wb') as out:
+                out.write(data)
+
+    def test_wsgi_serves_the_compressed_variant_with_long_caching(self):
+        django_calls = []
+        app = StaticFilesApp(lambda environ, start: django_calls.append(environ) or [], self.root, '/static/')
+        started = {}
+        body = b''.join(app({
+            'PATH_INFO': '/static/site.0123456789ab.css', 'REQUEST_METHOD': 'GET',
+            'HTTP_ACCEPT_ENCODING': 'gzip, deflate',
+        }, lambda status, headers: started.update(status=status, headers=dict(headers))))
+        self.assertEqual(started['status'], '200 OK')
+        self.assertEqual(started['headers']['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', started['headers']['Cache-Control'])
+        self.assertEqual(gzip.decompress(body), CSS)
+        self.assertEqual(django_calls, [])
+
+    def test_asgi_serves_files_and_passes_everything_else_on(self):
+        passed = []
+
+        async def django(scope, receive, send):
+            passed.append(scope['path'])
+
+        app = ASGIStaticFilesApp(django, self.root, '/static/')
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def get(path, **headers):
+            scope = {'type': 'http', 'method': 'GET', 'path': path,
+                     'headers': [(k.encode(), v.encode()) for k, v in headers.items()]}
+            await app(scope, None, send)
+
+        asyncio.run(get('/static/site.0123456789ab.css', **{'accept-encoding': 'br'}))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(b''.join(message.get('body', b'') for message in sent[1:]), CSS)
+        etag = dict(sent[0]['headers'])[b'etag'].decode()
+        sent.clear()
+        asyncio.run(get('/static/site.0123456789ab.css', **{'if-none-match': etag}))
+        self.assertEqual(sent[0]['status'], 304)
+        asyncio.run(get('/auction-list/'))
+        self.assertEqual(passed, ['/auction-list/'])
+
+
+class MediaFilesAppTests(SimpleTestCase):
+    digest = 'ab' * 32
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.root = scratch.name
+        self.django_calls = []
+        self.app = MediaFilesApp(lambda environ, start: self.django_calls.append(environ['PATH_INFO']) or [],
+                                 self.root, '/media/')
+        override = override_settings(MEDIA_ROOT=self.root, MEDIA_URL='/media/')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, url):
+        started = {}
+        body = b''.join(self.app({'PATH_INFO': url, 'REQUEST_METHOD': 'GET'},
+                                 lambda status, headers: started.update(status=status, headers=dict(headers))))
+        return started, body
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as out:
+            out.write(data)
+
+    def test_derivatives_written_after_startup_are_served_with_long_caching(self):
+        image = LotImage(derivatives.original_name(self.digest, '.jpg'), self.digest, 1000, 800, '')
+        self.write(derivatives.derivative_name(self.digest, 'thumb'), b'RIFF-thumb')
+        started, body = self.get(image.thumbnail_url)
+        self.assertEqual(started['status'], '200 OK')
+        self.assertEqual(started['headers']['Content-Type'], 'image/webp')
+        self.assertIn('immutable', started['headers']['Cache-Control'])
+        self.assertEqual(body, b'RIFF-thumb')
+        self.assertEqual(self.django_calls, [])
+
+    @skipUnless(derivatives.Image, 'needs Pillow')
+    def test_generated_derivatives_are_served(self):
+        original = derivatives.original_name(self.digest, '.png')
+        os.makedirs(os.path.dirname(os.path.join(self.root, original)))
+        derivatives.Image.new('RGB', (700, 500), 'red').save(os.path.join(self.root, original))
+        widths = derivatives.build(self.root, original, self.digest, (320, 640, 960), 200)
+        image = LotImage(original, self.digest, 700, 500, ','.join(map(str, widths)))
+        started, body = self.get(image.src(640))
+        self.assertEqual(started['status'], '200 OK')
+        self.assertIn('immutable', started['headers']['Cache-Control'])
+        self.assertEqual(body[8:12], b'WEBP')
+
+    def test_other_uploads_are_cached_briefly(self):
+        self.write('notes.txt', b'hello')
+        started, _ = self.get('/media/notes.txt')
+        self.assertEqual(started['headers']['Cache-Control'], 'public, max-age=300')
+
+    def test_missing_partial_and_outside_files_go_to_django(self):
+        self.write('lots/ab/%s-320.webp.part' % self.digest, b'half')
+        for url in ('/media/lots/ab/missing.webp', '/media/lots/ab/%s-320.webp.part' % self.digest,
+                    '/media/../secret.txt', '/auction-list/'):
+            self.get(url)
+        self.assertEqual(len(self.django_calls), 4)
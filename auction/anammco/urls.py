@@ -1,13 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 # anammco/urls.py
-from .views import index, auction_list, place_bid
+from .views import (
+    export_bids, item_detail, perf_stats, rate_limit_stats, search, set_proxy_bid, upload_lot_image,
+)
+
+# Under ASGI the bidding hot path is served by the async views and the
+# other views run on the database pool, not on Django's one sync thread.
+if settings.ANAMMCO_ASYNC_VIEWS:
+    hot, pooled = async_views, async_views.pooled
+else:
+    hot, pooled = views, lambda view: view
 
 urlpatterns = [
-    path(' ', views.index, name='index'),
-    path('auction-list/', auction_list, name='auction_list'),
-    path('place-bid/<int:item_id>/', place_bid, name='place_bid'),
+    path(' ', hot.index, name='index'),
+    path('auction-list/', hot.auction_list, name='auction_list'),
+    path('item/<int:item_id>/', pooled(item_detail), name='item_detail'),
+    path('place-bid/<int:item_id>/', hot.place_bid, name='place_bid'),
+    path('item/<int:item_id>/image/', pooled(upload_lot_image), name='upload_lot_image'),
+    path('proxy-bid/<int:item_id>/', pooled(set_proxy_bid), name='set_proxy_bid'),
+    path('search/', pooled(search), name='search'),
+    path('export/bids/', pooled(export_bids), name='export_bids'),
+    path('wait/<int:item_id>/', async_views.wait_for_bid, name='wait_for_bid'),
+    path('stats/rate-limits/', pooled(rate_limit_stats), name='rate_limit_stats'),
+    path('stats/perf/', pooled(perf_stats), name='perf_stats'),
     # Add more paths as needed for your app
-]
\ No newline at end of file
+]
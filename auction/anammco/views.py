@@ -1,8 +1,37 @@
-from django.shortcuts import render, redirect
-from django.contrib.auth.decorators import login_required
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404, render, redirect
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required, permission_required
+from django.middleware.csrf import get_token
+from django.views.decorators.http import condition
 from django.utils import timezone
-from .models import Item, Bid
-from django.http import HttpResponse
+from .models import Item
+from .bid_cache import bid_cache
+from .bidding import parse_amount, place, publish_price
+from .exports import STREAMS, export_queryset, gzip_stream, last_bid_id
+from .fragments import lot_versions
+from .images import images_for, store_upload
+from .ingest import BidQueueFull
+from .pagination import keyset_page
+from .perf import histograms
+from .querybudget import query_budget
+from .proxy import PROXY_ATTEMPTS, resolve_proxies, set_proxy
+from .ratelimit import limiter, rate_limit_bids
+from .search import search_items
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+LIST_TEMPLATE = 'anammco/aution_list.html'
+
+# Most queries per request, whatever the page or lot holds (see querybudget).
+# The list: session, user, the page, prices missing from the cache, photos.
+LIST_QUERY_BUDGET = 5
+# A bid: session, user, the bid itself (the UPDATE, the Bid row and a
+# soft-close UPDATE), the check for proxies, then for each proxy attempt
+# three reads and its bid.
+BID_QUERY_BUDGET = 2 + 3 + 1 + PROXY_ATTEMPTS * (3 + 3)
 
 
 def index(request):
@@ -10,18 +39,170 @@ def index(request):
 
 
 
+def _list_page(request):
+    # Shared by the ETag check and the view, so a full render costs one query.
+    if not hasattr(request, '_lot_page'):
+        live = Item.objects.filter(auction_end_time__gte=timezone.now()).only(
+            'id', 'name', 'description', 'auction_end_time',
+        )
+        page = keyset_page(
+            live, settings.ANAMMCO_PAGE_SIZE,
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+        versions = lot_versions([item.pk for item in page])
+        for item in page:
+            item.version = versions.get(item.pk)
+        request._lot_page = page
+    return request._lot_page
+
+
+def _etag(request, *parts):
+    # Pages embed the user's CSRF token, so the validator covers its secret.
+    get_token(request)
+    key = [request.user.pk, request.META.get('CSRF_COOKIE'), *parts]
+    return hashlib.md5(repr(key).encode(), usedforsecurity=False).hexdigest()
+
+
+def auction_list_etag(request):
+    page = _list_page(request)
+    return _etag(request, [(item.pk, item.version) for item in page])
+
+
+@query_budget(LIST_QUERY_BUDGET)
 @login_required
+@condition(etag_func=auction_list_etag)
 def auction_list(request):
-    items = Item.objects.filter(auction_end_time__gte=timezone.now())
-    return render(request, 'auction/auction_list.html', {'items': items})
+    page = _list_page(request)
+    prices = bid_cache.prices_for([item.pk for item in page])
+    images = images_for([item.pk for item in page])
+    for item in page:
+        item.current_bid = prices.get(item.pk)
+        item.image = images.get(item.pk)
+    return render(request, LIST_TEMPLATE, {
+        'items': page.items,
+        'page': page,
+        'lot_cache_ttl': settings.ANAMMCO_LOT_FRAGMENT_TTL,
+    })
 
+@query_budget(BID_QUERY_BUDGET)
 @login_required
+@rate_limit_bids
 def place_bid(request, item_id):
-    item = Item.objects.get(pk=item_id)
+    accepted = False
+    if request.method == 'POST':
+        bid_amount = parse_amount(request.POST.get('bid_amount'))
+        if bid_amount is not None:
+            try:
+                accepted = place(request.user, item_id, bid_amount)
+            except BidQueueFull:
+                return HttpResponse('Too many bids in flight, try again.', status=503)
+    # Pages that listen to /events/ post bids with fetch() and keep the page.
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'item': item_id, 'accepted': accepted})
+    return redirect('auction_list')
+
+
+@login_required
+@rate_limit_bids
+def set_proxy_bid(request, item_id):
+    """Store the user's maximum; the engine bids for them up to it."""
+    price = None
     if request.method == 'POST':
-        bid_amount = request.POST['bid_amount']
-        if float(bid_amount) > item.current_bid:
-            Bid.objects.create(bidder=request.user, item=item, bid_amount=bid_amount)
-            item.current_bid = bid_amount
-            item.save()
+        max_amount = parse_amount(request.POST.get('max_amount'))
+        if max_amount is not None and Item.objects.filter(pk=item_id).exists():
+            set_proxy(request.user, item_id, max_amount)
+            price, extended_to = resolve_proxies(item_id)
+            if price is not None:
+                publish_price(item_id, price, extended_to)
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'item': item_id, 'current_bid': price})
     return redirect('auction_list')
+
+
+def item_etag(request, item_id):
+    return _etag(request, item_id, lot_versions([item_id]).get(item_id))
+
+
+@login_required
+@condition(etag_func=item_etag)
+def item_detail(request, item_id):
+    item = get_object_or_404(
+        Item.objects.only('id', 'name', 'description', 'auction_end_time'), pk=item_id,
+    )
+    return JsonResponse({
+        'id': item.pk,
+        'name': item.name,
+        'description': item.description,
+        'current_bid': bid_cache.prices_for([item.pk]).get(item.pk),
+        'auction_end_time': item.auction_end_time,
+    })
+
+
+@staff_member_required
+def upload_lot_image(request, item_id):
+    """Attach a photo to a lot; its resized copies are built in the background."""
+    upload = request.FILES.get('image')
+    if request.method != 'POST' or upload is None:
+        return JsonResponse({'error': 'POST the photo as "image".'}, status=400)
+    get_object_or_404(Item.objects.only('id'), pk=item_id)
+    try:
+        digest = store_upload(item_id, upload)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'item': item_id, 'image': digest}, status=202)
+
+
+@login_required
+def search(request):
+    items, next_cursor = search_items(
+        request.GET.get('q', ''), settings.ANAMMCO_PAGE_SIZE, after=request.GET.get('after'),
+    )
+    prices = bid_cache.prices_for([item.pk for item in items])
+    results = [{
+        'id': item.pk,
+        'name': item.name,
+        'description': item.description,
+        'current_bid': prices.get(item.pk),
+        'auction_end_time': item.auction_end_time,
+    } for item in items]
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+
+@login_required
+@permission_required('anammco.view_bid', raise_exception=True)
+def export_bids(request):
+    """Stream bid history as CSV or NDJSON, gzipped when the client accepts it.
+
+    ``?day=YYYY-MM-DD`` limits it to lots ending that day; ``after`` and
+    ``until`` bound the bid ids.  X-Export-Until pins the end of the
+    export: pass it back as ``until`` with ``after`` to resume.
+    """
+    export_format = request.GET.get('format', 'csv')
+    try:
+        stream, content_type = STREAMS[export_format]
+        day = date.fromisoformat(request.GET['day']) if request.GET.get('day') else None
+        after = int(request.GET['after']) if request.GET.get('after') else None
+        until = int(request.GET['until']) if request.GET.get('until') else last_bid_id()
+    except (KeyError, ValueError):
+        return HttpResponse('Bad export parameters.', status=400)
+    pieces = stream(export_queryset(day, after, until))
+    filename = 'bids-%s.%s' % (day or 'all', export_format)
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = StreamingHttpResponse(gzip_stream(pieces), content_type=content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = StreamingHttpResponse(pieces, content_type=content_type)
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    response['X-Export-Until'] = str(until)
+    return response
+
+
+@staff_member_required
+def rate_limit_stats(request):
+    return JsonResponse({'rejected': limiter.stats()})
+
+
+@staff_member_required
+def perf_stats(request):
+    return JsonResponse(histograms.snapshot())
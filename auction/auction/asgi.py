@@ -0,0 +1,24 @@
+"""
+ASGI config for auction project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Files in STATIC_ROOT and MEDIA_ROOT and price-change events for
+``/events/<item_id>/`` are served here directly; every other request goes
+to Django.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auction.settings')
+
+django_application = get_asgi_application()
+
+from anammco.realtime import EventRouter  # noqa: E402  (needs Django set up)
+from anammco.staticfiles import ASGIMediaFilesApp, ASGIStaticFilesApp  # noqa: E402
+
+application = ASGIStaticFilesApp(ASGIMediaFilesApp(EventRouter(django_application)))
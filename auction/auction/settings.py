@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'anammco.middleware.PerfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,13 +51,22 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'anammco.middleware.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'auction.urls'
 
+# Share of requests timed by PerfMiddleware (Server-Timing header and the
+# /stats/perf/ histograms). 1 times everything.
+ANAMMCO_PERF_SAMPLE_RATE = 0.05
+
+# Views' declared query budgets are checked in DEBUG; set this to check
+# them outside DEBUG too (e.g. on staging).
+ANAMMCO_ENFORCE_QUERY_BUDGETS = False
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'anammco.templating.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -72,17 +82,160 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'auction.wsgi.application'
 
+ASGI_APPLICATION = 'auction.asgi.application'
+
+# Serve the list and bid views as async views, for running under ASGI
+# (ANAMMCO_ASGI=1, see gunicorn.conf.py). Their database work, and every
+# other view, runs on ANAMMCO_DB_THREADS threads; long-poll waiters hold no
+# thread at all. Off, the app is served over WSGI by a pool of threads.
+ANAMMCO_ASYNC_VIEWS = os.environ.get('ANAMMCO_ASGI') == '1'
+ANAMMCO_DB_THREADS = 8
+ANAMMCO_LONG_POLL_SECONDS = 25
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # django.db.backends.sqlite3 plus WAL and tuned pragmas on connect.
+        'ENGINE': 'anammco.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 5,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'synchronous': 'NORMAL',
+                'mmap_size': 268435456,
+                'cache_size': -20000,
+            },
+        },
     }
 }
 
+# Read replicas for browsing and search, e.g.
+# ANAMMCO_READ_REPLICAS=/srv/replica1.sqlite3,/srv/replica2.sqlite3
+# Local SQLite replicas are refreshed with `manage.py sync_replicas`.
+ANAMMCO_READ_REPLICAS = []
+for n, path in enumerate(filter(None, os.environ.get('ANAMMCO_READ_REPLICAS', '').split(',')), 1):
+    alias = 'replica%d' % n
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        # Replicas are only read, so they don't take the write lock up front.
+        'OPTIONS': {k: v for k, v in DATABASES['default']['OPTIONS'].items() if k != 'transaction_mode'},
+        'TEST': {'MIRROR': 'default'},
+    }
+    ANAMMCO_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['anammco.routers.PrimaryReplicaRouter']
+
+# After a POST, a browser reads from the primary for this many seconds.
+ANAMMCO_REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # State every worker must agree on: prices, lot and user versions,
+    # sessions. See ANAMMCO_REDIS_URL below.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    # Used by {% cache %} for the per-lot blocks of the auction list.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+# With more than one worker process (see gunicorn.conf.py) the 'shared'
+# cache must be Redis, e.g. ANAMMCO_REDIS_URL=redis://127.0.0.1:6379/1
+# (needs the redis package). Without it the cache is per process.
+ANAMMCO_REDIS_URL = os.environ.get('ANAMMCO_REDIS_URL')
+if ANAMMCO_REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ANAMMCO_REDIS_URL,
+    }
+
+# Sessions are cached_db: reads come from the 'shared' cache and writes go
+# through to the database, so a logout in one worker ends the session in all.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+
+# request.user comes from a per-process user cache. A save (password change,
+# deactivation) or logout bumps the user's version in the VERSIONS cache,
+# which every worker checks before serving its copy. ModelBackend stays
+# listed so sessions logged in before the cached backend keep working.
+AUTHENTICATION_BACKENDS = [
+    'anammco.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+ANAMMCO_USER_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 30,
+    'VERSIONS': 'shared',
+    'VERSION_TTL': 3600,
+}
+
+# Highest-bid cache in front of Item.current_bid, shared across workers
+# through BACKEND. Each worker trusts its own copy for LOCAL_TTL seconds.
+# BACKEND None keeps prices per process, which is only right for one worker.
+ANAMMCO_BID_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 300,
+    'LOCAL_TTL': 1,
+    'BACKEND': 'shared',
+}
+
+# Lots per page on the auction list (keyset paginated).
+ANAMMCO_PAGE_SIZE = 24
+
+# Per-lot fragments of the auction list are cached under a version counter
+# that is bumped on every accepted bid. The counters live in this alias,
+# which must be shared by every worker for ETags and fragments to agree.
+# A counter that expires is reseeded above its old value, so the TTL only
+# costs a re-render.
+ANAMMCO_LOT_VERSION_CACHE = 'shared'
+ANAMMCO_LOT_VERSION_TTL = 3600
+ANAMMCO_LOT_FRAGMENT_TTL = 600
+
+
+# Proxy (automatic) bids raise the price by this much over what they must beat.
+ANAMMCO_BID_INCREMENT = '1000'
+
+# Anti-sniping soft close: a bid within WINDOW seconds of the end moves the
+# end to EXTEND_TO seconds after the bid. Set to None to disable.
+ANAMMCO_SOFT_CLOSE = {'WINDOW': 60, 'EXTEND_TO': 120}
+
+# How long lots relisted from the admin run for.
+ANAMMCO_RELIST_HOURS = 7 * 24
+
+# Group commit for bids: when set, bids are queued and committed in batches of
+# up to BATCH_SIZE or every MAX_DELAY_MS, whichever comes first.
+ANAMMCO_GROUP_COMMIT = None
+# ANAMMCO_GROUP_COMMIT = {'BATCH_SIZE': 64, 'MAX_DELAY_MS': 5, 'QUEUE_SIZE': 10000}
+
+# Bid rate limits as (tokens per second, burst) for each scope. Set
+# ANAMMCO_BID_RATE_LIMIT_BACKEND to a cache alias to share them across workers.
+ANAMMCO_BID_RATE_LIMITS = {
+    'user': (2, 10),
+    'item': (50, 200),
+    'global': (500, 2000),
+}
+ANAMMCO_BID_RATE_LIMIT_BACKEND = None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -119,6 +272,25 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Served by auction/wsgi.py and auction/asgi.py, digest-named lot photos
+# with a year's caching.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Lot photos (needs Pillow): WebP copies at these widths plus a square
+# thumbnail, built by ANAMMCO_IMAGE_WORKERS background processes.
+ANAMMCO_IMAGE_WIDTHS = (320, 640, 960, 1280)
+ANAMMCO_IMAGE_THUMBNAIL = 200
+ANAMMCO_IMAGE_WORKERS = 2
+
+# collectstatic fingerprints and precompresses assets (run vendor_assets
+# first to self-host the CDN files); auction/wsgi.py and auction/asgi.py serve them.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'anammco.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
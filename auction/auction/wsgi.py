@@ -0,0 +1,23 @@
+"""
+WSGI config for auction project.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+Files collected into STATIC_ROOT are served in front of Django, already
+compressed and with far-future caching for fingerprinted names; uploads
+and lot photo derivatives in MEDIA_ROOT are served the same way.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auction.settings')
+
+django_application = get_wsgi_application()
+
+from anammco.staticfiles import MediaFilesApp, StaticFilesApp  # noqa: E402  (needs Django set up)
+
+application = StaticFilesApp(MediaFilesApp(django_application))
@@ -0,0 +1,32 @@
+# Run with: gunicorn -c gunicorn.conf.py
+#
+# WSGI (the default): each worker serves ANAMMCO_THREADS requests at once
+# on its own threads. There is no /events/ stream, so pages post bids as
+# plain forms, and every long-poll on /wait/ holds a thread while it waits.
+#
+# ASGI (ANAMMCO_ASGI=1, needs uvicorn): one event loop per worker serves the
+# async list and bid views, /events/ and long-polls, which hold no thread.
+# Everything else runs on the ANAMMCO_DB_THREADS database pool, since Django
+# would otherwise run sync views one at a time on a single thread. The admin
+# still does; keep heavy admin work on a WSGI instance.
+import os
+
+if os.environ.get('ANAMMCO_ASGI') == '1':
+    wsgi_app = 'auction.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'auction.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('ANAMMCO_THREADS', 8))
+
+# Prices, versions and sessions are shared through the 'shared' cache, which
+# is only shared between processes when ANAMMCO_REDIS_URL is set. The price
+# broker is in-process either way, so live updates only reach clients of the
+# worker that took the bid. Raise this once events go through a shared bus.
+workers = int(os.environ.get('ANAMMCO_WORKERS', 1))
+if workers > 1 and not os.environ.get('ANAMMCO_REDIS_URL'):
+    raise SystemExit('ANAMMCO_WORKERS > 1 needs ANAMMCO_REDIS_URL for the shared cache.')
+bind = os.environ.get('ANAMMCO_BIND', '0.0.0.0:8000')
+# Long-poll and event-stream clients sit idle for a long time.
+timeout = 120
+keepalive = 75